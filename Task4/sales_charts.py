@@ -1,6 +1,33 @@
+import argparse
+import io
+import json
+import os
+import sys
+import weakref
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+
+QUALITY_PROFILES={"draft":72,"screen":150,"print":300}
+settings={"dpi":QUALITY_PROFILES["print"]}
+
+def load_data(path):
+    df=pd.read_csv(path)
+    df["date"]=pd.to_datetime(df["date"])
+    df.set_index("date",inplace=True)
+    return df
+
+def generate_sample_data(days=180,seed=None):
+    rng=np.random.RandomState(seed)
+    data={
+        "date":pd.date_range(start="2024-01-01",periods=days,freq="D"),
+        "sales":rng.randint(1000,5000,days),
+        "category":rng.choice(["A","B","C","D"],days),
+    }
+    df=pd.DataFrame(data)
+    df.set_index("date",inplace=True)
+    return df
 
 def load_or_generate_data():
     print("\nDo you want to load your own CSV? (y/n)")
@@ -8,117 +35,296 @@ def load_or_generate_data():
 
     if choice=="y":
         path=input("\nEnter CSV file path: ")
-        df=pd.read_csv(path)
-        df["date"]=pd.to_datetime(df["date"])
-        df.set_index("date",inplace=True)
+        df=load_data(path)
         print("CSV loaded successfully!")
     else:
         print("\nGenerating sample data...")
-        data={
-            "date":pd.date_range(start="2024-01-01",periods=180,freq="D"),
-            "sales":np.random.randint(1000,5000,180),
-            "category":np.random.choice(["A","B","C","D"],180),
-        }
-        df=pd.DataFrame(data)
-        df.set_index("date",inplace=True)
+        df=generate_sample_data()
         print("Sample data created!")
 
     return df
 
-def plot_line(df):
-    plt.figure(figsize=(10,5))
-    plt.plot(df.index, df["sales"])
-    plt.title("Daily Sales Over Time")
-    plt.xlabel("Date")
-    plt.ylabel("Sales")
-    plt.grid(True,alpha=0.3)
-    plt.tight_layout()
-    plt.savefig("line_chart.png",dpi=300)
-    plt.close()
-    print("Saved: line_chart.png")
-
-def plot_monthly(df):
-    monthly=df["sales"].resample("ME").sum()
-    plt.figure(figsize=(10,5))
-    plt.plot(monthly.index,monthly.values)
-    plt.title("Monthly Sales")
-    plt.xlabel("Month")
-    plt.ylabel("Sales")
-    plt.grid(True,alpha=0.3)
-    plt.tight_layout()
-    plt.savefig("monthly_chart.png",dpi=300)
-    plt.close()
-    print("Saved: monthly_chart.png")
-
-def plot_quarterly(df):
-    quarterly=df["sales"].resample("QE").sum()
-    plt.figure(figsize=(8,5))
-    plt.bar(quarterly.index.strftime("%Y-Q%q"),quarterly.values)
-    plt.title("Quarterly Sales")
-    plt.xlabel("Quarter")
-    plt.ylabel("Sales")
-    plt.tight_layout()
-    plt.savefig("quarterly_chart.png",dpi=300)
-    plt.close()
-    print("Saved: quarterly_chart.png")
-
-def plot_category_bar(df):
-    category_sales=df.groupby("category")["sales"].sum()
-    plt.figure(figsize=(8,5))
-    plt.bar(category_sales.index,category_sales.values)
-    plt.title("Sales by Category")
-    plt.xlabel("Category")
-    plt.ylabel("Sales")
-    plt.tight_layout()
-    plt.savefig("category_bar.png",dpi=300)
-    plt.close()
-    print("Saved: category_bar.png")
-
-def plot_category_pie(df):
-    category_sales=df.groupby("category")["sales"].sum()
-    plt.figure(figsize=(6,6))
-    plt.pie(category_sales.values,labels=category_sales.index,autopct="%1.1f%%")
-    plt.title("Category Share")
-    plt.tight_layout()
-    plt.savefig("category_pie.png",dpi=300)
-    plt.close()
-    print("Saved: category_pie.png")
+# The rollups of the last frame seen. Keyed by the frame object, not its
+# contents: the menu never edits the frame, and hashing every row would cost
+# more than the rollups themselves.
+_rollup_cache={"frame":None,"rollups":None}
 
-def generate_summary(df):
-    monthly=df["sales"].resample("ME").sum()
-    quarterly=df["sales"].resample("QE").sum()
-    category_sales=df.groupby("category")["sales"].sum()
+def compute_rollups(df):
+    # Every aggregate the charts and summary use, from one pass: the daily
+    # cube feeds the monthly one, which feeds the quarterly one.
+    daily=df["sales"].groupby(level=0).sum()
+    monthly=daily.resample("ME").sum()
+    quarterly=monthly.resample("QE").sum()
+    category=df.groupby("category",sort=True)["sales"].sum()
+    return {
+        "daily":daily,
+        "monthly":monthly,
+        "quarterly":quarterly,
+        "category":category,
+        "total":df["sales"].sum(),
+        "mean":df["sales"].mean(),
+        "start":df.index.min(),
+        "end":df.index.max(),
+    }
+
+def get_rollups(df):
+    frame=_rollup_cache["frame"]
+    if frame is None or frame() is not df:
+        _rollup_cache["frame"]=weakref.ref(df)
+        _rollup_cache["rollups"]=compute_rollups(df)
+    return _rollup_cache["rollups"]
+
+def render_line(daily,path,dpi):
+    # Charts are drawn on standalone Agg figures, never through pyplot's
+    # global state, so they can be rendered in parallel worker processes.
+    fig=Figure(figsize=(10,5))
+    ax=fig.add_subplot()
+    ax.plot(daily.index,daily.values)
+    ax.set_title("Daily Sales Over Time")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Sales")
+    ax.grid(True,alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(path,dpi=dpi)
+    return path
+
+def render_monthly(monthly,path,dpi):
+    fig=Figure(figsize=(10,5))
+    ax=fig.add_subplot()
+    ax.plot(monthly.index,monthly.values)
+    ax.set_title("Monthly Sales")
+    ax.set_xlabel("Month")
+    ax.set_ylabel("Sales")
+    ax.grid(True,alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(path,dpi=dpi)
+    return path
+
+def render_quarterly(quarterly,path,dpi):
+    fig=Figure(figsize=(8,5))
+    ax=fig.add_subplot()
+    ax.bar(quarterly.index.strftime("%Y-Q%q"),quarterly.values)
+    ax.set_title("Quarterly Sales")
+    ax.set_xlabel("Quarter")
+    ax.set_ylabel("Sales")
+    fig.tight_layout()
+    fig.savefig(path,dpi=dpi)
+    return path
+
+def render_category_bar(category_sales,path,dpi):
+    fig=Figure(figsize=(8,5))
+    ax=fig.add_subplot()
+    ax.bar(category_sales.index,category_sales.values)
+    ax.set_title("Sales by Category")
+    ax.set_xlabel("Category")
+    ax.set_ylabel("Sales")
+    fig.tight_layout()
+    fig.savefig(path,dpi=dpi)
+    return path
+
+def render_category_pie(category_sales,path,dpi):
+    fig=Figure(figsize=(6,6))
+    ax=fig.add_subplot()
+    ax.pie(category_sales.values,labels=category_sales.index,autopct="%1.1f%%")
+    ax.set_title("Category Share")
+    fig.tight_layout()
+    fig.savefig(path,dpi=dpi)
+    return path
+
+# chart name -> (renderer, rollup it draws, output file)
+CHARTS={
+    "line":(render_line,"daily","line_chart.png"),
+    "monthly":(render_monthly,"monthly","monthly_chart.png"),
+    "quarterly":(render_quarterly,"quarterly","quarterly_chart.png"),
+    "category_bar":(render_category_bar,"category","category_bar.png"),
+    "category_pie":(render_category_pie,"category","category_pie.png"),
+}
+
+def render_chart(df,name,output_dir=".",dpi=None):
+    render,rollup,filename=CHARTS[name]
+    return render(get_rollups(df)[rollup],os.path.join(output_dir,filename),dpi or settings["dpi"])
+
+def plot_line(df): print(f"Saved: {render_chart(df,'line')}")
+def plot_monthly(df): print(f"Saved: {render_chart(df,'monthly')}")
+def plot_quarterly(df): print(f"Saved: {render_chart(df,'quarterly')}")
+def plot_category_bar(df): print(f"Saved: {render_chart(df,'category_bar')}")
+def plot_category_pie(df): print(f"Saved: {render_chart(df,'category_pie')}")
+
+def submit_charts(pool,rollups,charts=None,output_dir=".",dpi=None):
+    # Only the small rollup series are sent to the workers, not the frame.
+    dpi=dpi or settings["dpi"]
+    return [
+        pool.submit(render,rollups[rollup],os.path.join(output_dir,filename),dpi)
+        for name,(render,rollup,filename) in CHARTS.items() if charts is None or name in charts
+    ]
+
+def render_all(df,charts=None,output_dir=".",dpi=None,workers=None):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [future.result() for future in submit_charts(pool,get_rollups(df),charts,output_dir,dpi)]
+
+def summarize(df):
+    return summarize_rollups(get_rollups(df))
+
+def summarize_rollups(rollups):
+    # The summary figures as plain values; nothing is written.
+    monthly=rollups["monthly"]
+    quarterly=rollups["quarterly"]
+    category_sales=rollups["category"]
 
     q_index=quarterly.idxmax()
-    q_year=q_index.year
-    q_month=q_index.month
-    q_number=(q_month-1)//3+1
-    best_quarter_label=f"{q_year}-Q{q_number}"
+    q_number=(q_index.month-1)//3+1
+    return {
+        "start":rollups["start"].date(),
+        "end":rollups["end"].date(),
+        "total":rollups["total"],
+        "mean":rollups["mean"],
+        "best_month":monthly.idxmax().strftime("%B %Y"),
+        "best_month_sales":monthly.max(),
+        "best_quarter":f"{q_index.year}-Q{q_number}",
+        "best_quarter_sales":quarterly.max(),
+        "top_category":category_sales.idxmax(),
+        "top_category_sales":category_sales.max(),
+        "low_category":category_sales.idxmin(),
+        "low_category_sales":category_sales.min(),
+    }
 
-    summary=f"""
+def format_summary(summary):
+    return f"""
 Sales Summary Report
 ---------------------------------------
-Date Range:{df.index.min().date()} to {df.index.max().date()}
+Date Range:{summary['start']} to {summary['end']}
 
-Total Sales:{df['sales'].sum()}
-Average Daily Sales:{df['sales'].mean():.2f}
+Total Sales:{summary['total']}
+Average Daily Sales:{summary['mean']:.2f}
 
-Best Month:{monthly.idxmax().strftime('%B %Y')}({monthly.max()})
-Best Quarter:{best_quarter_label}({quarterly.max()})
+Best Month:{summary['best_month']}({summary['best_month_sales']})
+Best Quarter:{summary['best_quarter']}({summary['best_quarter_sales']})
 
-Top Category:{category_sales.idxmax()}({category_sales.max()})
-Lowest Category:{category_sales.idxmin()}({category_sales.min()})
+Top Category:{summary['top_category']}({summary['top_category_sales']})
+Lowest Category:{summary['low_category']}({summary['low_category_sales']})
 """
 
-    with open("summary.txt","w") as f:
-        f.write(summary)
+def write_summary(rollups,output_dir="."):
+    path=os.path.join(output_dir,"summary.txt")
+    with open(path,"w") as f:
+        f.write(format_summary(summarize_rollups(rollups)))
+    return path
 
-    print("Saved: summary.txt")
+def generate_summary(df):
+    print(f"Saved: {write_summary(get_rollups(df))}")
+
+def new_state():
+    return {"files":{},"start":None,"end":None,"rows":0,"total":0,"daily":{},"monthly":{},"quarterly":{},"category":{}}
+
+def load_state(path):
+    if not os.path.exists(path):
+        return new_state()
+    with open(path) as f:
+        return json.load(f)
+
+def save_state(state,path):
+    # Written to a temporary file first so a crash never leaves a torn state.
+    tmp=path+".tmp"
+    with open(tmp,"w") as f:
+        json.dump(state,f)
+    os.replace(tmp,path)
+
+def state_series(totals,dates=True):
+    series=pd.Series(totals,dtype="int64" if all(isinstance(v,int) for v in totals.values()) else "float64")
+    if dates:
+        series.index=pd.to_datetime(series.index)
+    else:
+        # Category labels are kept as text: JSON keys always come back as
+        # strings, so a numeric label must not be folded in as a number.
+        series.index=series.index.astype(str)
+    return series
+
+def series_totals(series):
+    keys=series.index.strftime("%Y-%m-%d") if isinstance(series.index,pd.DatetimeIndex) else series.index
+    return dict(zip(keys,series.tolist()))
+
+def read_new_rows(path,entry):
+    # Only the bytes after the stored offset are parsed. A trailing partial
+    # line (a file still being written) is left for the next run, so a file
+    # must end with a newline for its last row to be folded.
+    # A file whose header changed or that shrank was rewritten and is read
+    # from the start again.
+    with open(path,"rb") as f:
+        header=f.readline()
+        resumed=bool(entry) and entry["header"]==header.decode() and os.fstat(f.fileno()).st_size>=entry["offset"]
+        offset=entry["offset"] if resumed else len(header)
+        f.seek(offset)
+        tail=f.read()
+    complete=tail.rfind(b"\n")+1
+    names=pd.read_csv(io.BytesIO(header)).columns
+    if complete:
+        df=pd.read_csv(io.BytesIO(tail[:complete]),header=None,names=names,dtype={"category":str})
+    else:
+        df=pd.DataFrame(columns=names)
+    df["date"]=pd.to_datetime(df["date"])
+    df.set_index("date",inplace=True)
+    return df,{"header":header.decode(),"offset":offset+complete,"partial":complete<len(tail)},resumed
+
+def fold_rows(state,df):
+    if df.empty:
+        return
+    daily=df["sales"].groupby(level=0).sum()
+    labels=df["category"].astype(str).mask(df["category"].isna())
+    category=df["sales"].groupby(labels.to_numpy(),sort=True).sum()
+    if state["daily"]:
+        daily=pd.concat([state_series(state["daily"]),daily]).groupby(level=0).sum()
+        category=pd.concat([state_series(state["category"],dates=False),category]).groupby(level=0).sum()
+    # Months and quarters are re-derived from the daily totals, which grow
+    # by one entry per day rather than per row.
+    monthly=daily.resample("ME").sum()
+    state.update(
+        start=daily.index.min().strftime("%Y-%m-%d"),
+        end=daily.index.max().strftime("%Y-%m-%d"),
+        rows=state["rows"]+len(df),
+        total=state["total"]+df["sales"].sum().item(),
+        daily=series_totals(daily),
+        monthly=series_totals(monthly),
+        quarterly=series_totals(monthly.resample("QE").sum()),
+        category=series_totals(category),
+    )
+
+def append_files(state,paths):
+    # Files seen before resume from their byte offset, and unseen files are
+    # folded in full, whatever dates they cover. Each file keeps its own
+    # high-water mark: only a file that was rewritten since its last fold is
+    # filtered by it, since its rows up to that date are already counted.
+    folded=0
+    for path in paths:
+        key=os.path.abspath(path)
+        previous=state["files"].get(key)
+        df,entry,resumed=read_new_rows(path,previous)
+        if previous and not resumed and previous.get("end"):
+            df=df[df.index>pd.Timestamp(previous["end"])]
+        ends=[previous["end"]] if previous and previous.get("end") else []
+        if not df.empty:
+            ends.append(df.index.max().strftime("%Y-%m-%d"))
+        entry["end"]=max(ends) if ends else None
+        fold_rows(state,df)
+        state["files"][key]=entry
+        folded+=len(df)
+    return folded
+
+def state_rollups(state):
+    return {
+        "daily":state_series(state["daily"]),
+        "monthly":state_series(state["monthly"]),
+        "quarterly":state_series(state["quarterly"]),
+        "category":state_series(state["category"],dates=False),
+        "total":state["total"],
+        "mean":state["total"]/state["rows"],
+        "start":pd.Timestamp(state["start"]),
+        "end":pd.Timestamp(state["end"]),
+    }
 
 def menu():
     df=load_or_generate_data()
     while True:
-        print("""
+        print(f"""
 Choose what you want to generate:
 1 : Line Chart (Sales Over Time)
 2 : Monthly Sales Chart
@@ -127,6 +333,7 @@ Choose what you want to generate:
 5 : Category Pie Chart
 6 : Generate Summary Report
 7 : Generate ALL Charts + Summary
+8 : Change Quality Profile (current: {settings["dpi"]} dpi)
 0 : Exit
 """)
         choice=input("> ").strip()
@@ -138,16 +345,98 @@ Choose what you want to generate:
         elif choice=="5": plot_category_pie(df)
         elif choice=="6": generate_summary(df)
         elif choice=="7":
-            plot_line(df)
-            plot_monthly(df)
-            plot_quarterly(df)
-            plot_category_bar(df)
-            plot_category_pie(df)
+            for path in render_all(df):
+                print(f"Saved: {path}")
             generate_summary(df)
+        elif choice=="8":
+            print("Profiles: "+", ".join(f"{name} ({dpi} dpi)" for name,dpi in QUALITY_PROFILES.items()))
+            profile=input("> ").strip().lower()
+            if profile in QUALITY_PROFILES:
+                settings["dpi"]=QUALITY_PROFILES[profile]
+            else:
+                print("Unknown profile. Keeping current setting.")
         elif choice=="0":
             print("Exiting program.")
             break
         else:
             print("Invalid choice. Try again.")
 
-menu()
+def expand_inputs(paths):
+    inputs=[]
+    for path in paths:
+        if os.path.isdir(path):
+            inputs.extend(os.path.join(path,name) for name in sorted(os.listdir(path)) if name.lower().endswith(".csv"))
+        else:
+            inputs.append(path)
+    return inputs
+
+def run(paths,charts=None,output_dir=".",dpi=None,workers=None,summary=True):
+    # Charts for every input go through one process pool. With several
+    # inputs each gets its own <output_dir>/<file stem>/ folder.
+    outputs={}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending={}
+        for path in paths:
+            df=load_data(path)
+            target=output_dir if len(paths)==1 else os.path.join(output_dir,os.path.splitext(os.path.basename(path))[0])
+            os.makedirs(target,exist_ok=True)
+            # Every frame here is new, so there is nothing to cache.
+            rollups=compute_rollups(df)
+            pending[path]=submit_charts(pool,rollups,charts,target,dpi)
+            outputs[path]=[write_summary(rollups,target)] if summary else []
+        for path,futures in pending.items():
+            outputs[path]=[future.result() for future in futures]+outputs[path]
+    return outputs
+
+def run_append(paths,state_path,charts=None,output_dir=".",dpi=None,workers=None,summary=True):
+    # Folds only the new rows of every input into the persisted state, then
+    # regenerates the charts and summary from the state alone.
+    state=load_state(state_path)
+    folded=append_files(state,paths)
+    waiting=[path for path in paths if state["files"][os.path.abspath(path)].get("partial")]
+    if not state["rows"]:
+        raise ValueError("no sales rows to summarise")
+    save_state(state,state_path)
+    rollups=state_rollups(state)
+    os.makedirs(output_dir,exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        written=[future.result() for future in submit_charts(pool,rollups,charts,output_dir,dpi)]
+    if summary:
+        written.append(write_summary(rollups,output_dir))
+    return folded,written,waiting
+
+def main(argv=None):
+    argv=sys.argv[1:] if argv is None else argv
+    if not argv:
+        menu()
+        return
+    parser=argparse.ArgumentParser(description="Render sales charts and a summary from daily sales CSVs.")
+    parser.add_argument("paths",nargs="+",help="sales CSVs, or directories of them")
+    parser.add_argument("--charts",nargs="+",choices=list(CHARTS),help="charts to render (default: all)")
+    parser.add_argument("--output-dir",default=".")
+    quality=parser.add_mutually_exclusive_group()
+    quality.add_argument("--dpi",type=int)
+    quality.add_argument("--quality",choices=list(QUALITY_PROFILES),default="print")
+    parser.add_argument("--workers",type=int)
+    parser.add_argument("--no-summary",action="store_true")
+    parser.add_argument("--append",metavar="STATE",help="fold only new rows into this rollup state file; a last row is only folded once it ends with a newline")
+    args=parser.parse_args(argv)
+
+    paths=expand_inputs(args.paths)
+    if not paths:
+        parser.error("no CSV files found")
+    dpi=args.dpi or QUALITY_PROFILES[args.quality]
+    if args.append:
+        folded,written,waiting=run_append(paths,args.append,args.charts,args.output_dir,dpi,args.workers,not args.no_summary)
+        print(f"Folded {folded} new rows: "+", ".join(written))
+        for path in waiting:
+            print(f"{path}: last line has no newline yet and was not folded",file=sys.stderr)
+        return
+    outputs=run(paths,args.charts,args.output_dir,dpi,args.workers,not args.no_summary)
+    for path,written in outputs.items():
+        print(f"{path}: "+", ".join(written))
+
+# Guarded so the module can be imported (and chart worker processes can
+# start) without running anything.
+if __name__=="__main__":
+    main()
@@ -0,0 +1,32 @@
+import sales_charts
+
+def write(path,text,mode="w"):
+    with open(path,mode) as f:
+        f.write(text)
+
+def test_resume_keeps_numeric_categories_as_one_key(tmp_path):
+    csv=tmp_path/"sales.csv"
+    state_path=str(tmp_path/"state.json")
+    write(csv,"date,sales,category\n2024-01-01,10,1\n2024-01-02,20,2\n")
+    state=sales_charts.new_state()
+    sales_charts.append_files(state,[str(csv)])
+    sales_charts.save_state(state,state_path)
+
+    write(csv,"2024-01-03,30,1\n","a")
+    state=sales_charts.load_state(state_path)
+    assert sales_charts.append_files(state,[str(csv)])==1
+    assert state["category"]=={"1":40,"2":20}
+    summary=sales_charts.summarize_rollups(sales_charts.state_rollups(state))
+    assert (summary["top_category"],summary["top_category_sales"])==("1",40)
+
+def test_unterminated_last_line_waits_for_its_newline(tmp_path):
+    csv=tmp_path/"sales.csv"
+    write(csv,"date,sales,category\n2024-01-01,10,A\n2024-01-02,20,B")
+    state=sales_charts.new_state()
+    assert sales_charts.append_files(state,[str(csv)])==1
+    assert state["files"][str(csv)]["partial"]
+
+    write(csv,"\n","a")
+    assert sales_charts.append_files(state,[str(csv)])==1
+    assert state["total"]==30
+    assert not state["files"][str(csv)]["partial"]
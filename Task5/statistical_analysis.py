@@ -1,6 +1,21 @@
+import os
+import sys
+import weakref
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+ROOT=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0,ROOT)
+from dashboard_common.sketch import QuantileSketch
+
+# Sketch size used when a column is streamed from disk rather than held in
+# memory; quantile ranks are then accurate to about 1%.
+SKETCH_ERROR=0.01
+CHUNK_ROWS=1_000_000
+HIST_BINS=20
+
 def load_data():
     file_path=input("Enter CSV file path: ")
     return pd.read_csv(file_path)
@@ -12,10 +27,150 @@ def choose_column(df,message):
         col=input("Invalid column. Enter again: ")
     return col
 
+class Moments:
+    # Count, mean and central moment sums up to the 4th. Each chunk is
+    # reduced with numpy and merged with the pairwise update formulas, so the
+    # result is one numerically stable pass however the data is split.
+    def __init__(self):
+        self.n=0
+        self.mean=0.0
+        self.m2=self.m3=self.m4=0.0
+        self.min=np.inf
+        self.max=-np.inf
+
+    def update(self,values):
+        nb=len(values)
+        if not nb:
+            return self
+        mb=values.mean()
+        c=values-mb
+        c2=c*c
+        m2b,m3b,m4b=c2.sum(),(c2*c).sum(),(c2*c2).sum()
+        na,ma=self.n,self.mean
+        n=na+nb
+        d=mb-ma
+        dn=d/n
+        self.m4+=m4b+d*dn**3*na*nb*(na*na-na*nb+nb*nb)+6*dn*dn*(na*na*m2b+nb*nb*self.m2)+4*dn*(na*m3b-nb*self.m3)
+        self.m3+=m3b+d*dn*dn*na*nb*(na-nb)+3*dn*(na*m2b-nb*self.m2)
+        self.m2+=m2b+d*dn*na*nb
+        self.mean=ma+nb*dn
+        self.n=n
+        self.min=min(self.min,values.min())
+        self.max=max(self.max,values.max())
+        return self
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2/(self.n-1)) if self.n>1 else np.nan
+
+    @property
+    def skew(self):
+        # Bias-adjusted Fisher-Pearson coefficient, as pandas' skew().
+        n=self.n
+        if n<3:
+            return np.nan
+        if self.m2==0:
+            return 0.0
+        g1=(self.m3/n)/(self.m2/n)**1.5
+        return np.sqrt(n*(n-1))/(n-2)*g1
+
+class ColumnProfile:
+    # Everything the menu reports about one column, from one read of it.
+    def __init__(self,name,error=SKETCH_ERROR,k=None):
+        self.name=name
+        self.missing=0
+        self.moments=Moments()
+        self.sketch=QuantileSketch(error,seed=0,k=k)
+
+    def update(self,values):
+        values=np.asarray(values,dtype="float64")
+        nan=np.isnan(values)
+        self.missing+=int(nan.sum())
+        values=values[~nan]
+        self.moments.update(values)
+        self.sketch.update(values)
+        return self
+
+    @property
+    def count(self):
+        return self.moments.n
+
+    @property
+    def std(self):
+        return self.moments.std
+
+    @property
+    def skew(self):
+        return self.moments.skew
+
+    def quartiles(self):
+        return self.sketch.quantile([0.25,0.5,0.75])
+
+    def describe(self):
+        m=self.moments
+        q1,q2,q3=self.quartiles() if m.n else (np.nan,)*3
+        lo,hi=(m.min,m.max) if m.n else (np.nan,np.nan)
+        return pd.Series(
+            [float(m.n),m.mean if m.n else np.nan,m.std,lo,q1,q2,q3,hi],
+            index=["count","mean","std","min","25%","50%","75%","max"],name=self.name,
+        )
+
+    def iqr_bounds(self):
+        q1,_,q3=self.quartiles()
+        iqr=q3-q1
+        return q1-1.5*iqr,q3+1.5*iqr
+
+    def histogram(self,bins=HIST_BINS):
+        # Same edges as np.histogram; counts are exact while the sketch is.
+        # A column with no numbers (e.g. text) gets empty bins over 0..1.
+        if not self.count:
+            return np.histogram([],bins=bins)
+        items,weights=self.sketch.weighted_items()
+        lo,hi=self.moments.min,self.moments.max
+        if lo==hi:
+            lo,hi=lo-0.5,hi+0.5
+        return np.histogram(items,bins=bins,range=(lo,hi),weights=weights)
+
+_profile_cache={}
+
+def numeric_column(df,value_col):
+    # Converted in place once; later calls find a numeric column.
+    if not pd.api.types.is_numeric_dtype(df[value_col]):
+        df[value_col]=pd.to_numeric(df[value_col],errors="coerce")
+    return df[value_col]
+
+def get_profile(df,value_col):
+    # Cached per frame object and column; the entry goes away with the frame.
+    # The menu never edits values after the one numeric conversion, so the
+    # frame's identity is enough and the column is not re-read to check it.
+    key=(id(df),value_col)
+    cached=_profile_cache.get(key)
+    if cached is None or cached[0]() is not df:
+        series=numeric_column(df,value_col)
+        # Sized to the column, so an in-memory profile is exact.
+        profile=ColumnProfile(value_col,k=len(series)).update(series.to_numpy(dtype="float64",na_value=np.nan))
+        cached=_profile_cache[key]=(weakref.ref(df,forget_profile(key)),profile)
+    return cached[1]
+
+def forget_profile(key):
+    # Weakref callback; only drops the entry if it still belongs to the
+    # frame that died, not a newer frame at the same address.
+    def drop(ref):
+        if key in _profile_cache and _profile_cache[key][0] is ref:
+            del _profile_cache[key]
+    return drop
+
+def profile_csv(path,value_col,chunksize=CHUNK_ROWS,error=SKETCH_ERROR):
+    # For files too large to load: reads only the one column, in chunks.
+    profile=ColumnProfile(value_col,error)
+    for chunk in pd.read_csv(path,usecols=[value_col],chunksize=chunksize):
+        profile.update(pd.to_numeric(chunk[value_col],errors="coerce").to_numpy(dtype="float64",na_value=np.nan))
+    return profile
+
 def plot_histogram(df,value_col):
-    df[value_col]=pd.to_numeric(df[value_col],errors="coerce")
+    counts,edges=get_profile(df,value_col).histogram()
     plt.figure(figsize=(8,5))
-    plt.hist(df[value_col].dropna(),bins=20)
+    plt.hist(edges[:-1],bins=edges,weights=counts)
     plt.title(f"Histogram of {value_col}")
     plt.xlabel(value_col)
     plt.ylabel("Frequency")
@@ -24,9 +179,8 @@ def plot_histogram(df,value_col):
     print("Histogram saved as histogram.png")
 
 def plot_kde(df,value_col):
-    df[value_col]=pd.to_numeric(df[value_col],errors="coerce")
     plt.figure(figsize=(8,5))
-    df[value_col].dropna().plot(kind='kde')
+    numeric_column(df,value_col).dropna().plot(kind='kde')
     plt.title(f"KDE of {value_col}")
     plt.xlabel(value_col)
     plt.savefig("kde.png")
@@ -34,7 +188,7 @@ def plot_kde(df,value_col):
     print("KDE saved as kde.png")
 
 def plot_boxplot(df,column,group=None,log_scale=False):
-    df[column]=pd.to_numeric(df[column],errors="coerce")
+    numeric_column(df,column)
     df=df.dropna(subset=[column])
 
     plt.figure(figsize=(8,5))
@@ -65,7 +219,7 @@ def plot_grouped(df,value_col, group_col):
         print("Group column not found.")
         return
 
-    df[value_col]=pd.to_numeric(df[value_col],errors="coerce")
+    numeric_column(df,value_col)
 
     plt.figure(figsize=(8,5))
     for key, grp in df.groupby(group_col):
@@ -85,13 +239,7 @@ def plot_grouped(df,value_col, group_col):
     print("Grouped Boxplot saved as boxplot_by_group.png")
 
 def detect_outliers(df,value_col):
-    df[value_col]=pd.to_numeric(df[value_col],errors="coerce")
-    Q1=df[value_col].quantile(0.25)
-    Q3=df[value_col].quantile(0.75)
-    IQR=Q3-Q1
-    
-    lower=Q1-1.5*IQR
-    upper=Q3+1.5*IQR
+    lower,upper=get_profile(df,value_col).iqr_bounds()
     
     outliers=df[(df[value_col]<lower)|(df[value_col]>upper)]
     
@@ -101,8 +249,7 @@ def detect_outliers(df,value_col):
     print("Outliers saved as outliers.csv")
 
 def summary_statistics(df,value_col):
-    df[value_col]=pd.to_numeric(df[value_col],errors="coerce")
-    stats=df[value_col].describe()
+    stats=get_profile(df,value_col).describe()
 
     print("\n--- Summary Statistics ---")
     print(stats)
@@ -111,9 +258,9 @@ def summary_statistics(df,value_col):
     print("Summary statistics saved as summary_statistics.csv")
 
 def interpretation(df,value_col):
-    df[value_col]=pd.to_numeric(df[value_col],errors="coerce")
-    skewness=df[value_col].skew()
-    spread=df[value_col].std()
+    profile=get_profile(df,value_col)
+    skewness=profile.skew
+    spread=profile.std
 
     if skewness>0:
         direction="right-skewed (tail toward higher values)"
@@ -200,4 +347,6 @@ def menu():
 
         else:
             print("Invalid choice. Try again.")
-menu()
+
+if __name__=="__main__":
+    menu()
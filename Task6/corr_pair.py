@@ -4,14 +4,12 @@ import matplotlib.pyplot as plt
 import numpy as np
 import os
 
-file_path=input("Enter CSV file path: ")
-df=pd.read_csv(file_path)
-numeric_df=df.select_dtypes(include=np.number)
-
 output_folder="analysis_outputs"
-os.makedirs(output_folder,exist_ok=True)
 
-def correlation_heatmap():
+def numeric_columns(df):
+    return df.select_dtypes(include=np.number)
+
+def correlation_heatmap(numeric_df):
     corr=numeric_df.corr(method='pearson')
     plt.figure(figsize=(10,8))
     mask=np.triu(np.ones_like(corr,dtype=bool))
@@ -24,18 +22,22 @@ def correlation_heatmap():
     print(f"Heatmap saved as:{heatmap_file}")
     return corr
 
-def pairplot():
-    pairplot_fig=sns.pairplot(df[numeric_df.columns.tolist()])
+def pairplot(numeric_df):
+    pairplot_fig=sns.pairplot(numeric_df)
     pairplot_file=os.path.join(output_folder,"pairplot.png")
     pairplot_fig.savefig(pairplot_file)
     plt.close()
     print(f"Pairplot saved as:{pairplot_file}")
 
-def strongest_correlations(corr):
+def strongest_pairs(corr):
     corr_pairs=corr.unstack()
     corr_pairs=corr_pairs[corr_pairs!=1]  
     strongest_pos = corr_pairs.sort_values(ascending=False).head(5)
     strongest_neg = corr_pairs.sort_values().head(5)
+    return strongest_pos,strongest_neg
+
+def strongest_correlations(corr):
+    strongest_pos,strongest_neg=strongest_pairs(corr)
 
     summary_file=os.path.join(output_folder,"strongest_correlations.txt")
     with open(summary_file,"w") as f:
@@ -46,25 +48,35 @@ def strongest_correlations(corr):
     
     print(f"Strongest correlations saved as: {summary_file}")
 
-while True:
-    print("\nChoose an option:")
-    print("1. Correlation Heatmap")
-    print("2. Pairplot / Scatter Matrix")
-    print("3. Strongest Correlations")
-    print("4. Exit")
+def main():
+    file_path=input("Enter CSV file path: ")
+    df=pd.read_csv(file_path)
+    numeric_df=numeric_columns(df)
+    os.makedirs(output_folder,exist_ok=True)
+    corr=None
+
+    while True:
+        print("\nChoose an option:")
+        print("1. Correlation Heatmap")
+        print("2. Pairplot / Scatter Matrix")
+        print("3. Strongest Correlations")
+        print("4. Exit")
     
-    choice=input("Enter your choice: ")
+        choice=input("Enter your choice: ")
     
-    if choice=="1":
-        corr=correlation_heatmap()
-    elif choice=="2":
-        pairplot()
-    elif choice=="3":
-        if 'corr' not in locals():
-            corr=numeric_df.corr()
-        strongest_correlations(corr)
-    elif choice=="4":
-        print("Exiting")
-        break
-    else:
-        print("Invalid choice. Try again.")
+        if choice=="1":
+            corr=correlation_heatmap(numeric_df)
+        elif choice=="2":
+            pairplot(numeric_df)
+        elif choice=="3":
+            if corr is None:
+                corr=numeric_df.corr()
+            strongest_correlations(corr)
+        elif choice=="4":
+            print("Exiting")
+            break
+        else:
+            print("Invalid choice. Try again.")
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,210 @@
+import argparse
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+DEFAULT_START = "2023-01-01"
+DEFAULT_DAYS = 730
+
+# product -> (category, typical unit price)
+PRODUCTS = {
+    "Body Lotion": ("Beauty & Personal Care", 320),
+    "Face Cream": ("Beauty & Personal Care", 450),
+    "Perfume": ("Beauty & Personal Care", 1800),
+    "Shampoo": ("Beauty & Personal Care", 280),
+    "Dress": ("Fashion", 1500),
+    "Jacket": ("Fashion", 2800),
+    "Jeans": ("Fashion", 1400),
+    "T-Shirt": ("Fashion", 600),
+    "Gold-Plated Cooker": ("Kitchen Essentials", 9500),
+    "Knife Set": ("Kitchen Essentials", 1200),
+    "Mixer Grinder": ("Kitchen Essentials", 3500),
+    "Non-stick Pan": ("Kitchen Essentials", 900),
+    "Pressure Cooker": ("Kitchen Essentials", 2200),
+    "OnePlus 11": ("Mobile Phones", 57000),
+    "Pixel 8": ("Mobile Phones", 75000),
+    "Samsung S23": ("Mobile Phones", 74000),
+    "Ultra Phone X": ("Mobile Phones", 120000),
+    "iPhone 14": ("Mobile Phones", 70000),
+}
+CATEGORY_MARGINS = {
+    "Beauty & Personal Care": 0.30,
+    "Fashion": 0.35,
+    "Kitchen Essentials": 0.22,
+    "Mobile Phones": 0.10,
+}
+# location -> (region, share of orders)
+LOCATIONS = {
+    "Delhi": ("North", 0.18),
+    "Jaipur": ("North", 0.06),
+    "Mumbai": ("West", 0.20),
+    "Pune": ("West", 0.08),
+    "Bangalore": ("South", 0.17),
+    "Chennai": ("South", 0.11),
+    "Hyderabad": ("South", 0.12),
+    "Kolkata": ("East", 0.08),
+}
+# Demand multipliers: festive peak in Oct-Nov, weekend lift, yearly growth.
+MONTH_FACTORS = np.array([0.90, 0.85, 0.95, 0.95, 1.00, 0.95, 0.90, 1.00, 1.05, 1.30, 1.40, 1.20])
+WEEKDAY_FACTORS = np.array([0.90, 0.90, 0.95, 1.00, 1.10, 1.30, 1.25])
+ANNUAL_GROWTH = 0.08
+# Chance that a line starts a new order; the rest extend the current basket.
+NEW_ORDER_RATE = 0.6
+COLUMNS = [
+    "date", "sales", "category", "quantity", "profit", "location", "product_name",
+    "order_id", "region", "unit_price",
+]
+
+
+def parse_count(text):
+    # "250000", "1_000_000", "1e6", "10M", "2.5B".
+    match = re.fullmatch(r"([\d_.eE+]+)([kKmMbB]?)", text.strip())
+    if not match:
+        raise ValueError(f"not a row count: {text!r}")
+    scale = {"": 1, "k": 10**3, "m": 10**6, "b": 10**9}[match.group(2).lower()]
+    return int(float(match.group(1).replace("_", "")) * scale)
+
+
+def day_weights(dates):
+    years = np.arange(len(dates)) / 365.25
+    return (
+        MONTH_FACTORS[dates.month - 1]
+        * WEEKDAY_FACTORS[dates.dayofweek]
+        * (1 + ANNUAL_GROWTH) ** years
+    )
+
+
+def product_table():
+    names = list(PRODUCTS)
+    categories = sorted(CATEGORY_MARGINS)
+    category_codes = np.array([categories.index(PRODUCTS[p][0]) for p in names])
+    prices = np.array([PRODUCTS[p][1] for p in names], dtype="float64")
+    # Cheaper items sell more often and in larger quantities.
+    popularity = prices ** -0.5
+    popularity /= popularity.sum()
+    mean_extra_qty = np.where(prices < 5000, 2.5, 0.3)
+    margins = np.array([CATEGORY_MARGINS[c] for c in categories])[category_codes]
+    return names, categories, category_codes, prices, popularity, mean_extra_qty, margins
+
+
+def generate_chunks(rows, chunk_rows=DEFAULT_CHUNK_ROWS, seed=0, start=DEFAULT_START, days=DEFAULT_DAYS):
+    # Yields DataFrames of at most chunk_rows rows, in date order. Rows are
+    # spread over the days in proportion to the seasonal demand curve, so
+    # every chunk is built with whole-array operations and no per-row Python.
+    # The same seed and chunk size always give the same rows.
+    dates = pd.date_range(start, periods=days, freq="D")
+    cdf = np.cumsum(day_weights(dates))
+    cdf /= cdf[-1]
+    names, categories, category_codes, prices, popularity, mean_extra_qty, margins = product_table()
+    locations = list(LOCATIONS)
+    regions = sorted({region for region, _ in LOCATIONS.values()})
+    location_regions = np.array([regions.index(LOCATIONS[loc][0]) for loc in locations])
+    location_p = np.array([share for _, share in LOCATIONS.values()])
+    location_p /= location_p.sum()
+
+    last_order, last_day, last_location = 0, -1, 0
+    for index, first in enumerate(range(0, rows, chunk_rows)):
+        rng = np.random.default_rng([seed, index])
+        n = min(chunk_rows, rows - first)
+        day = np.searchsorted(cdf, (np.arange(first, first + n) + 0.5) / rows, side="right")
+        day = np.minimum(day, days - 1)
+        product = rng.choice(len(names), size=n, p=popularity)
+        quantity = 1 + rng.poisson(mean_extra_qty[product])
+        unit_price = np.round(prices[product] * rng.lognormal(0.0, 0.15, n), 2)
+        sales = np.round(quantity * unit_price, 2)
+        profit = np.round(sales * margins[product] * rng.normal(1.0, 0.2, n), 2)
+
+        # An order never spans two days.
+        new_order = rng.random(n) < NEW_ORDER_RATE
+        new_order[1:] |= day[1:] != day[:-1]
+        new_order[0] |= day[0] != last_day
+        order_id = last_order + np.cumsum(new_order)
+        # One location per order, so a basket never spans cities or regions.
+        # An order continued from the previous chunk keeps that location.
+        order_location = rng.choice(len(locations), size=int(order_id[-1] - last_order) + 1, p=location_p)
+        order_location[0] = last_location
+        location = order_location[order_id - last_order]
+        last_order, last_day, last_location = int(order_id[-1]), int(day[-1]), int(location[-1])
+
+        yield pd.DataFrame({
+            "date": dates[day],
+            "sales": sales,
+            "category": pd.Categorical.from_codes(category_codes[product], categories),
+            "quantity": quantity,
+            "profit": profit,
+            "location": pd.Categorical.from_codes(location, locations),
+            "product_name": pd.Categorical.from_codes(product, names),
+            "order_id": order_id,
+            "region": pd.Categorical.from_codes(location_regions[location], regions),
+            "unit_price": unit_price,
+        }, columns=COLUMNS)
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet output needs pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def write_csv(chunks, path):
+    rows = 0
+    with open(path, "w", newline="") as f:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(f, header=i == 0, index=False, date_format="%Y-%m-%d")
+            rows += len(chunk)
+    return rows
+
+
+def write_parquet(chunks, path):
+    # One row group per chunk; the fixed category lists keep every chunk's
+    # schema identical.
+    pa = import_pyarrow()
+    rows, writer = 0, None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pa.parquet.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def output_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return "parquet" if os.path.splitext(path)[1].lower() in (".parquet", ".pq") else "csv"
+
+
+def write_sales(path, rows, fmt=None, chunk_rows=DEFAULT_CHUNK_ROWS, seed=0, start=DEFAULT_START, days=DEFAULT_DAYS):
+    chunks = generate_chunks(rows, chunk_rows, seed, start, days)
+    writer = write_parquet if output_format(path, fmt) == "parquet" else write_csv
+    return writer(chunks, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a seeded synthetic sales dataset.")
+    parser.add_argument("rows", type=parse_count, help="row count, e.g. 250000, 10M, 1.5B")
+    parser.add_argument("path", help="output file; .parquet/.pq writes Parquet, anything else CSV")
+    parser.add_argument("--format", choices=["csv", "parquet"])
+    parser.add_argument("--chunk-rows", type=parse_count, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", default=DEFAULT_START)
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS)
+    args = parser.parse_args(argv)
+
+    rows = write_sales(args.path, args.rows, args.format, args.chunk_rows, args.seed, args.start, args.days)
+    print(f"Wrote {rows:,} rows to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
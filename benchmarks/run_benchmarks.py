@@ -0,0 +1,250 @@
+import argparse
+import contextlib
+import copy
+import gc
+import importlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+
+import pandas as pd
+
+from generate_sales import parse_count, write_sales
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIERS = {"small": 100_000, "medium": 1_000_000, "large": 10_000_000, "xlarge": 100_000_000}
+DEFAULT_TIERS = ["small", "medium"]
+# Column roles for the sales dashboard, named as the generator writes them.
+DASHBOARD_MAPPING = {
+    "order": "order_id",
+    "date": "date",
+    "product": "product_name",
+    "region": "region",
+    "qty": "quantity",
+    "price": "unit_price",
+}
+VALUE_COLUMN = "sales"
+# A case counts as a regression when its best time exceeds the baseline's
+# by more than this factor.
+REGRESSION_RATIO = 1.25
+
+
+@dataclass
+class Timing:
+    tier: str
+    rows: int
+    suite: str
+    case: str
+    best: float
+    median: float
+    runs: int
+
+    @property
+    def key(self):
+        return (self.tier, self.suite, self.case)
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.best if self.best else float("inf")
+
+
+def import_from(folder, module):
+    # The tasks and the dashboards use flat, script-style imports; the
+    # dashboards also import the dashboard_common package from the root.
+    for path in (REPO, os.path.join(REPO, folder)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    return importlib.import_module(module)
+
+
+@contextlib.contextmanager
+def quiet():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def time_case(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+# Each suite does its untimed setup (imports, loading the frame) and returns
+# (case name, callable) pairs. Cases that write files write into the
+# current directory, which is a scratch folder while benchmarks run.
+
+def task4_cases(path):
+    charts = import_from("Task4", "sales_charts")
+    df = charts.load_data(path)
+    rollups = charts.compute_rollups(df)
+    charts.get_rollups(df)
+    folded = charts.new_state()
+    charts.append_files(folded, [path])
+    return [
+        ("load_data", lambda: charts.load_data(path)),
+        ("compute_rollups", lambda: charts.compute_rollups(df)),
+        ("get_rollups (cached)", lambda: charts.get_rollups(df)),
+        ("get_rollups (new frame)", lambda: charts.get_rollups(df.copy(deep=False))),
+        ("summarize", lambda: charts.summarize_rollups(rollups)),
+        ("append (full fold)", lambda: charts.append_files(charts.new_state(), [path])),
+        ("append (no new rows)", lambda: charts.append_files(copy.deepcopy(folded), [path])),
+    ]
+
+
+def dashboard_cases(path):
+    ingest = import_from("sales_analysis_app", "ingest")
+    utils = import_from("sales_analysis_app", "utils")
+    sampling = import_from("sales_analysis_app", "dashboard_common.sampling")
+    m = DASHBOARD_MAPPING
+    df = ingest.load_sales_frame(path, m)
+    columns = ingest.mapped_columns(m)
+    # The preview samples the uploaded bytes, as the app does.
+    with open(path, "rb") as f:
+        data = f.read()
+    return [
+        ("load_sales_frame", lambda: ingest.load_sales_frame(path, m)),
+        ("sales_kpis", lambda: utils.sales_kpis(df, m["order"], m["product"], m["region"], m["qty"], m["price"])),
+        ("region_partials", lambda: utils.region_partials(df, m["order"], m["product"], m["region"], m["qty"], m["price"])),
+        ("stream_region_partials", lambda: ingest.stream_region_partials(path, m)),
+        ("sample_rows (preview)", lambda: sampling.sample_rows(data, columns, sampling.PREVIEW_ROWS)),
+    ]
+
+
+def task5_cases(path):
+    stats = import_from("Task5", "statistical_analysis")
+    df = pd.read_csv(path)
+
+    def run(*fns):
+        def call():
+            # Each run starts cold, as a fresh session would.
+            stats._profile_cache.clear()
+            with quiet():
+                for fn in fns:
+                    fn(df, VALUE_COLUMN)
+        return call
+
+    return [
+        ("summary_statistics", run(stats.summary_statistics)),
+        ("interpretation", run(stats.interpretation)),
+        ("detect_outliers", run(stats.detect_outliers)),
+        ("all statistics", run(stats.detect_outliers, stats.summary_statistics, stats.interpretation)),
+        ("profile_csv (streamed)", lambda: stats.profile_csv(path, VALUE_COLUMN)),
+    ]
+
+
+def task6_cases(path):
+    corr_pair = import_from("Task6", "corr_pair")
+    numeric_df = corr_pair.numeric_columns(pd.read_csv(path))
+    corr = numeric_df.corr()
+    return [
+        ("pearson corr", lambda: numeric_df.corr()),
+        ("strongest_pairs", lambda: corr_pair.strongest_pairs(corr)),
+    ]
+
+
+SUITES = {
+    "task4": task4_cases,
+    "dashboard": dashboard_cases,
+    "task5": task5_cases,
+    "task6": task6_cases,
+}
+
+
+def dataset(rows, seed, data_dir):
+    # Generated files are reused across runs when data_dir is kept.
+    path = os.path.join(data_dir, f"sales_{rows}_{seed}.csv")
+    if os.path.exists(path):
+        return path, None
+    start = time.perf_counter()
+    write_sales(path, rows, seed=seed)
+    return path, time.perf_counter() - start
+
+
+def run_tier(tier, rows, suites, repeat, seed, data_dir):
+    path, generated = dataset(rows, seed, data_dir)
+    results = []
+    if generated is not None:
+        results.append(Timing(tier, rows, "generator", "write csv", generated, generated, 1))
+    for suite in suites:
+        try:
+            cases = SUITES[suite](path)
+        except ImportError as exc:
+            print(f"[{tier}] skipping {suite}: {exc}", file=sys.stderr)
+            continue
+        for case, fn in cases:
+            best, median = time_case(fn, repeat)
+            results.append(Timing(tier, rows, suite, case, best, median, repeat))
+            print(f"[{tier}] {suite:<10} {case:<24} {best:9.3f}s", file=sys.stderr)
+    return results
+
+
+def format_table(results):
+    lines = [f"{'tier':<8} {'rows':>12} {'suite':<10} {'case':<24} {'best s':>9} {'median s':>9} {'Mrows/s':>8}"]
+    for r in results:
+        lines.append(
+            f"{r.tier:<8} {r.rows:>12,} {r.suite:<10} {r.case:<24} "
+            f"{r.best:>9.3f} {r.median:>9.3f} {r.rows_per_second / 1e6:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def regressions(results, baseline, ratio=REGRESSION_RATIO):
+    previous = {(b["tier"], b["suite"], b["case"]): b["best"] for b in baseline}
+    slower = []
+    for r in results:
+        before = previous.get(r.key)
+        if before and r.best > before * ratio:
+            slower.append((r, before))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the sales aggregations across dataset size tiers.")
+    parser.add_argument("--tiers", nargs="+", choices=list(TIERS), default=DEFAULT_TIERS)
+    parser.add_argument("--rows", nargs="+", type=parse_count, help="custom row counts instead of --tiers")
+    parser.add_argument("--suites", nargs="+", choices=list(SUITES), default=list(SUITES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", help="keep generated datasets here and reuse them")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_RATIO)
+    args = parser.parse_args(argv)
+
+    tiers = [(f"{rows:,}", rows) for rows in args.rows] if args.rows else [(t, TIERS[t]) for t in args.tiers]
+    with tempfile.TemporaryDirectory() as scratch:
+        data_dir = os.path.abspath(args.data_dir or scratch)
+        os.makedirs(data_dir, exist_ok=True)
+        cwd = os.getcwd()
+        os.chdir(scratch)
+        try:
+            results = []
+            for tier, rows in tiers:
+                results.extend(run_tier(tier, rows, args.suites, args.repeat, args.seed, data_dir))
+        finally:
+            os.chdir(cwd)
+
+    print(format_table(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            slower = regressions(results, json.load(f), args.threshold)
+        for r, before in slower:
+            print(f"REGRESSION {r.tier} {r.suite} {r.case}: {before:.3f}s -> {r.best:.3f}s")
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
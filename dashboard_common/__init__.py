@@ -0,0 +1,5 @@
+# Modules shared by the sales and health dashboards; Task5 uses the quantile
+# sketch too. The package sits at the repository root, but the apps and
+# tasks run as scripts from their own folders, so each entry point (both
+# main.py files, sales_analysis_app/pipeline.py and Task5's script) puts the
+# root on sys.path before importing from here.
@@ -0,0 +1,78 @@
+import os
+
+import streamlit as st
+
+from .background import BackgroundJobs
+from .cache import LRUCache
+from .profiling import TraceToken, start_rerun
+from .store import content_hash
+
+DEFAULT_REPORT_CACHE_MB = 64
+
+# The Streamlit side of both dashboards. This is the only module in the
+# package that imports streamlit; the rest also run in batch jobs.
+
+
+class RerunTimings:
+    # Stage timings for this rerun; shown in the sidebar on request and
+    # appended to $<APP>_STAGE_LOG as JSON lines when that is set.
+
+    def __init__(self, app):
+        self.app = app
+        self.show = st.sidebar.checkbox("Show stage timings")
+        trace_memory = self.show and st.sidebar.checkbox("Trace peak allocations")
+        trace_token = st.session_state.setdefault("trace_token", TraceToken())
+        self.log = start_rerun(app, trace_memory, trace_token)
+        self.panel = st.sidebar.container()
+
+    def report(self):
+        log_path = os.environ.get(f"{self.app.upper()}_STAGE_LOG")
+        if log_path:
+            self.log.append_jsonl(log_path)
+        if self.show:
+            timings = self.log.to_frame()
+            timings["stage"] = ["  " * d + name for d, name in zip(timings["depth"], timings["stage"])]
+            self.panel.dataframe(timings.drop(columns="depth"), hide_index=True)
+            self.panel.download_button(
+                "Export timings (JSON lines)", self.log.to_jsonl(),
+                file_name=f"{self.app}_timings_{self.log.rerun_id}.jsonl", mime="application/x-ndjson"
+            )
+
+    def stop(self):
+        self.report()
+        st.stop()
+
+
+@st.cache_resource
+def read_static(path):
+    with open(path) as f:
+        return f.read()
+
+
+@st.cache_resource
+def get_report_cache(app):
+    # Budget from $<APP>_REPORT_CACHE_MB.
+    budget_mb = int(os.environ.get(f"{app.upper()}_REPORT_CACHE_MB", DEFAULT_REPORT_CACHE_MB))
+    return LRUCache(budget_mb * 1024 * 1024)
+
+
+@st.cache_resource
+def get_background_jobs():
+    return BackgroundJobs()
+
+
+def session_dataset(name, key, acquire):
+    # Keeps this session's reference to a shared dataset in session_state;
+    # replacing it, or the session ending, releases the previous one.
+    handles = st.session_state.setdefault("dataset_handles", {})
+    if name not in handles or handles[name].key != key:
+        handles[name] = acquire()
+    return handles[name].value
+
+
+def upload_hash(uploaded_file, data):
+    # Hash each upload once per session rather than on every rerun.
+    hashes = st.session_state.setdefault("upload_hashes", {})
+    if uploaded_file.file_id not in hashes:
+        hashes[uploaded_file.file_id] = content_hash(data)
+    return hashes[uploaded_file.file_id]
@@ -0,0 +1,29 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_FINISHED_JOBS = 32
+
+
+class BackgroundJobs:
+    # Exact computations run off the script thread while a preview is shown.
+    # Jobs are shared between sessions and deduplicated by key. Finished
+    # jobs, failed ones included, are kept for a while so their result or
+    # error reaches the rerun that asked for them even when the result is
+    # too large for the ingest cache.
+
+    def __init__(self, workers=2):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="exact")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn):
+        with self._lock:
+            future = self._jobs.get(key)
+            if future is None or future.cancelled():
+                future = self._jobs[key] = self._pool.submit(fn)
+            self._jobs.move_to_end(key)
+            finished = [k for k, f in self._jobs.items() if f.done()]
+            for stale in finished[:-MAX_FINISHED_JOBS]:
+                del self._jobs[stale]
+            return future
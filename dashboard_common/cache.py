@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def approx_nbytes(value):
+    if value is None:
+        return 0
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(index=True, deep=True)))
+    if isinstance(value, (tuple, list)):
+        return sum(approx_nbytes(item) for item in value)
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    return len(value)
+
+
+class LRUCache:
+    # Least-recently-used cache bounded by the total size of its values.
+    # Shared between Streamlit sessions, so every access takes the lock.
+
+    def __init__(self, max_bytes, sizeof=approx_nbytes):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes and self._evictable(key):
+                # Larger than the whole budget and held by no one: hand it
+                # back uncached.
+                return value
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            self._shrink(self.max_bytes)
+        return value
+
+    def _evictable(self, key):
+        return True
+
+    def _shrink(self, max_bytes):
+        # Drops least-recently-used evictable entries until the total fits
+        # max_bytes. The caller holds the lock.
+        for key in list(self._entries):
+            if self.current_bytes <= max_bytes:
+                break
+            if self._evictable(key):
+                self.current_bytes -= self._entries.pop(key)[1]
+
+    def get_or_load(self, key, loader):
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, loader())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
@@ -0,0 +1,84 @@
+import io
+
+UPLOAD_TYPES = ["csv", "parquet", "feather", "arrow"]
+MAGIC_BYTES = {b"PAR1": "parquet", b"ARROW1": "arrow"}
+
+
+def detect_format(data):
+    # Sniffed from the leading magic bytes, so renamed files still work.
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        head = bytes(data[:6])
+    else:
+        with open(data, "rb") as f:
+            head = f.read(6)
+    for magic, fmt in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return fmt
+    return "csv"
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet and Arrow uploads need pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def arrow_source(data):
+    # Uploaded bytes are wrapped without copying; paths are memory-mapped.
+    pa = import_pyarrow()
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return pa.BufferReader(data)
+    if isinstance(data, io.BytesIO):
+        return pa.BufferReader(data.getbuffer())
+    return pa.memory_map(str(data))
+
+
+def read_schema(data):
+    pa = import_pyarrow()
+    if detect_format(data) == "parquet":
+        return pa.parquet.read_schema(arrow_source(data))
+    return pa.ipc.open_file(arrow_source(data)).schema
+
+
+def read_table(data, columns=None):
+    # Only the requested columns are decoded (projection pushdown).
+    pa = import_pyarrow()
+    if detect_format(data) == "parquet":
+        return pa.parquet.read_table(arrow_source(data), columns=columns)
+    return pa.feather.read_table(arrow_source(data), columns=columns)
+
+
+def read_frame(data, columns=None):
+    return read_table(data, columns).to_pandas()
+
+
+def read_preview(data, nrows=5):
+    pa = import_pyarrow()
+    if detect_format(data) == "parquet":
+        batches = pa.parquet.ParquetFile(arrow_source(data)).iter_batches(batch_size=nrows)
+        batch = next(batches, None)
+        if batch is None:
+            return read_schema(data).empty_table().to_pandas()
+        return batch.to_pandas()
+    reader = pa.ipc.open_file(arrow_source(data))
+    if reader.num_record_batches == 0:
+        return reader.schema.empty_table().to_pandas()
+    return reader.get_batch(0).slice(0, nrows).to_pandas()
+
+
+def iter_frames(data, columns, batch_size):
+    pa = import_pyarrow()
+    if detect_format(data) == "parquet":
+        parquet_file = pa.parquet.ParquetFile(arrow_source(data))
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+        return
+    reader = pa.ipc.open_file(arrow_source(data))
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i).select(columns)
+        for offset in range(0, batch.num_rows, batch_size):
+            yield batch.slice(offset, batch_size).to_pandas()
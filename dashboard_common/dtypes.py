@@ -0,0 +1,77 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Text columns with at most this share of distinct values become categoricals.
+CATEGORY_MAX_RATIO = 0.5
+
+
+@dataclass
+class DtypeReport:
+    before_bytes: int
+    after_bytes: int
+    changed: dict = field(default_factory=dict)
+
+    @property
+    def saved_bytes(self):
+        return self.before_bytes - self.after_bytes
+
+    @property
+    def saved_ratio(self):
+        return self.saved_bytes / self.before_bytes if self.before_bytes else 0.0
+
+    def summary(self):
+        mb = 1024 * 1024
+        return (
+            f"{self.after_bytes / mb:,.1f} MB in memory "
+            f"({self.saved_bytes / mb:,.1f} MB / {self.saved_ratio:.0%} saved by dtype optimisation)"
+        )
+
+
+def downcast_float(values):
+    # Integral floats without NaN become integers; the rest go to float32
+    # only when that is lossless, so sums and means are unchanged.
+    array = values.to_numpy()
+    integral = not np.isnan(array).any() and np.abs(array).max() < 2 ** 53
+    if integral and np.array_equal(array, np.round(array)):
+        return pd.to_numeric(values.astype("int64"), downcast="integer")
+    narrow = values.astype("float32")
+    if np.array_equal(narrow.to_numpy().astype(array.dtype), array, equal_nan=True):
+        return narrow
+    return values
+
+
+def optimise_series(values, category_ratio=CATEGORY_MAX_RATIO):
+    dtype = values.dtype
+    if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return values
+    if pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+        return pd.to_numeric(values, downcast="integer")
+    if pd.api.types.is_float_dtype(dtype) and isinstance(dtype, np.dtype) and len(values):
+        return downcast_float(values)
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        # Only homogeneous text: mixed object columns have no sort order.
+        if len(values) and pd.api.types.infer_dtype(values, skipna=True) == "string":
+            if values.nunique(dropna=True) <= category_ratio * len(values):
+                return values.astype("category")
+    return values
+
+
+def optimise_frame(df, category_ratio=CATEGORY_MAX_RATIO, exclude=()):
+    # Returns a new frame with narrower dtypes plus a DtypeReport; the input
+    # is left untouched. Excluded columns keep their dtype.
+    before = int(df.memory_usage(deep=True).sum())
+    columns = {}
+    changed = {}
+    for col in df.columns:
+        values = df[col]
+        if col not in exclude:
+            values = optimise_series(values, category_ratio)
+            if values.dtype != df[col].dtype:
+                changed[col] = (str(df[col].dtype), str(values.dtype))
+        columns[col] = values
+    optimised = pd.DataFrame(columns, index=df.index)
+    report = DtypeReport(before, int(optimised.memory_usage(deep=True).sum()), changed)
+    optimised.attrs["dtype_report"] = report
+    return optimised, report
@@ -0,0 +1,137 @@
+import contextvars
+import json
+import threading
+import time
+import tracemalloc
+import uuid
+import weakref
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+import pandas as pd
+
+_current_log = contextvars.ContextVar("stage_log", default=None)
+
+# tracemalloc is process-wide, so it stays on while any session still asks
+# for it. Sessions are tracked by a token kept in their session_state, and
+# a session that goes away releases its request with it.
+_tracing_sessions = {}
+_tracing_lock = threading.RLock()
+_started_tracing = False
+
+
+class TraceToken:
+    pass
+
+
+_single_user = TraceToken()
+
+
+@dataclass
+class StageTiming:
+    stage: str
+    depth: int
+    seconds: float
+    peak_bytes: int = None
+
+
+@dataclass
+class StageLog:
+    # Timings for one script rerun, in the order stages finished. Peaks are
+    # the highest traced allocation above the stage's starting point, and
+    # are only recorded while tracemalloc is on. The traced peak is shared by
+    # the whole process: while other sessions trace at the same time their
+    # allocations show up in this log's peaks too.
+    app: str
+    rerun_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    started_at: float = field(default_factory=time.time)
+    stages: list = field(default_factory=list)
+    _open: list = field(default_factory=list, repr=False)
+
+    def to_frame(self):
+        return pd.DataFrame([asdict(s) for s in self.stages], columns=["stage", "depth", "seconds", "peak_bytes"])
+
+    def to_jsonl(self):
+        common = {"app": self.app, "rerun_id": self.rerun_id, "started_at": self.started_at}
+        return "".join(json.dumps({**common, **asdict(s)}) + "\n" for s in self.stages)
+
+    def append_jsonl(self, path):
+        with open(path, "a") as f:
+            f.write(self.to_jsonl())
+
+
+def _update_tracing():
+    # Starts tracemalloc for the first session that wants it and stops it
+    # after the last one; tracing started by someone else is left alone.
+    global _started_tracing
+    with _tracing_lock:
+        if _tracing_sessions and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        elif not _tracing_sessions and _started_tracing:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            _started_tracing = False
+
+
+def _release_tracing(key):
+    with _tracing_lock:
+        _tracing_sessions.pop(key, None)
+        _update_tracing()
+
+
+def start_rerun(app, trace_memory=False, session=None):
+    # Makes a fresh StageLog current for this thread's rerun. tracemalloc
+    # slows allocation, so it only runs while some session has asked for it;
+    # session is that session's TraceToken (one shared token without it).
+    session = session if session is not None else _single_user
+    key = id(session)
+    with _tracing_lock:
+        if trace_memory and key not in _tracing_sessions:
+            _tracing_sessions[key] = weakref.ref(session, lambda _, key=key: _release_tracing(key))
+        elif not trace_memory:
+            _tracing_sessions.pop(key, None)
+        _update_tracing()
+    log = StageLog(app)
+    _current_log.set(log)
+    return log
+
+
+def current_log():
+    return _current_log.get()
+
+
+@contextmanager
+def stage(name):
+    # Times the enclosed block into the current rerun's log; a no-op when no
+    # rerun is being recorded (batch jobs, worker processes).
+    log = _current_log.get()
+    if log is None:
+        yield
+        return
+    tracing = tracemalloc.is_tracing()
+    frame = None
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        # Resetting the peak for this stage must not lose the enclosing
+        # stages' peaks so far.
+        for parent in log._open:
+            if parent is not None:
+                parent[1] = max(parent[1], peak)
+        tracemalloc.reset_peak()
+        frame = [current, current]
+    log._open.append(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        log._open.pop()
+        peak_bytes = None
+        if frame is not None and tracemalloc.is_tracing():
+            frame[1] = max(frame[1], tracemalloc.get_traced_memory()[1])
+            for parent in log._open:
+                if parent is not None:
+                    parent[1] = max(parent[1], frame[1])
+            peak_bytes = frame[1] - frame[0]
+        log.stages.append(StageTiming(name, len(log._open), seconds, peak_bytes))
@@ -0,0 +1,110 @@
+import base64
+import hashlib
+import io
+import re
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from .cache import LRUCache
+from .profiling import stage
+
+PLACEHOLDER = re.compile(r"{{\s*(\w+)\s*}}")
+MIME_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+def encode_figure(fig, fmt="png", dpi=None):
+    buf = io.BytesIO()
+    # Keep SVG text as <text> elements rather than glyph outlines.
+    with stage(f"savefig ({fmt})"), plt.rc_context({"svg.fonttype": "none"}):
+        fig.savefig(buf, format=fmt, bbox_inches="tight", dpi=dpi)
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def chart_key(*parts):
+    # Stable key for a chart: pandas objects hash by content, anything else
+    # (chart parameters, upload hashes, column names) by its repr.
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, (pd.Series, pd.DataFrame, pd.Index)):
+            digest.update(pd.util.hash_pandas_object(part).to_numpy().tobytes())
+            if isinstance(part, pd.DataFrame):
+                digest.update(repr(list(part.columns)).encode("utf-8"))
+        else:
+            digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class SectionRenderer:
+    # Parses the section template once and memoises encoded chart images, so
+    # re-rendering an unchanged chart never touches matplotlib again.
+
+    def __init__(self, template_path, max_bytes=64 * 1024 * 1024, dpi=None):
+        with open(template_path) as f:
+            self._tokens = PLACEHOLDER.split(f.read())
+        self.dpi = dpi
+        self.images = LRUCache(max_bytes)
+
+    def section_html(self, **values):
+        # Odd tokens are placeholder names, even tokens literal template text.
+        return "".join(
+            values.get(token, "") if i % 2 else token for i, token in enumerate(self._tokens)
+        )
+
+    def encode(self, key, plot, fmt="png"):
+        cached = self.images.get((key, fmt))
+        if cached is None:
+            cached = self.store(key, encode_figure(plot(), fmt, self.dpi), fmt)
+        return cached
+
+    def store(self, key, image, fmt="png"):
+        # Caches an image encoded elsewhere, e.g. by a worker process.
+        with stage("base64 encode"):
+            img_base64 = base64.b64encode(image).decode("utf-8")
+        html = f'<img src="data:{MIME_TYPES[fmt]};base64,{img_base64}" width="100%"/>'
+        return self.images.put((key, fmt), (image, html))
+
+    def render(self, title, subtitle, key=None, plot=None, fmt="png"):
+        image = None
+        if plot is not None:
+            image, content = self.encode(key, plot, fmt)
+        else:
+            content = "<p>No data available</p>"
+        html = self.section_html(
+            section_title=title, section_subtitle=subtitle, section_content=content
+        )
+        return html, image
+
+
+def lttb_indices(y, threshold, x=None):
+    # Largest-Triangle-Three-Buckets: positions of the points that best keep
+    # the visual shape of a long series. The first and last points are kept.
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    y = np.asarray(y, dtype="float64")
+    x = np.arange(n, dtype="float64") if x is None else np.asarray(x, dtype="float64")
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    edges[-1] = n - 1
+    picked = np.empty(threshold, dtype=int)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        picked[i + 1] = a
+    return picked
+
+
+def downsample_series(series, threshold):
+    if len(series) <= threshold:
+        return series
+    return series.iloc[lttb_indices(series.to_numpy(), threshold)]
@@ -0,0 +1,179 @@
+import io
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from . import columnar
+
+PREVIEW_ROWS = 20_000
+# Rows drawn from the file per preview row kept; the surplus sets the
+# stratum sizes and lets small strata keep their floor.
+POOL_FACTOR = 4
+MIN_PER_STRATUM = 200
+Z_95 = 1.96
+
+
+def sample_csv_rows(data, columns, n, rng):
+    # Seeks to random byte offsets and keeps the line starting after each,
+    # so no more than the sampled lines are parsed. Rows after long lines are
+    # slightly favoured, and quoted fields spanning lines are not supported.
+    header_end = data.find(b"\n") + 1
+    if header_end == 0 or header_end >= len(data):
+        return pd.read_csv(io.BytesIO(data), usecols=columns), 0
+    offsets = np.unique(rng.integers(header_end - 1, len(data) - 1, size=n))
+    starts = set()
+    lines = []
+    for offset in offsets:
+        start = data.find(b"\n", offset) + 1
+        if start == 0 or start >= len(data) or start in starts:
+            continue
+        starts.add(start)
+        end = data.find(b"\n", start)
+        lines.append(data[start:] if end == -1 else data[start:end + 1])
+    if lines and not lines[-1].endswith(b"\n"):
+        lines[-1] += b"\n"
+    body = b"".join(lines)
+    sample = pd.read_csv(
+        io.BytesIO(data[:header_end] + body), usecols=columns, on_bad_lines="skip"
+    )
+    mean_line = len(body) / len(lines) if lines else 1
+    return sample, int(round((len(data) - header_end) / mean_line))
+
+
+def sample_columnar_rows(data, columns, n, rng):
+    # Arrow files are memory-mapped, so a random take touches only the
+    # sampled rows. Parquet is sampled by whole row groups, picked at random.
+    pa = columnar.import_pyarrow()
+    if columnar.detect_format(data) == "parquet":
+        parquet_file = pa.parquet.ParquetFile(columnar.arrow_source(data))
+        metadata = parquet_file.metadata
+        picked, rows = [], 0
+        for group in rng.permutation(metadata.num_row_groups):
+            picked.append(int(group))
+            rows += metadata.row_group(group).num_rows
+            if rows >= n:
+                break
+        table = parquet_file.read_row_groups(sorted(picked), columns=columns)
+        total_rows = metadata.num_rows
+    else:
+        table = columnar.read_table(data, columns)
+        total_rows = table.num_rows
+    if table.num_rows > n:
+        table = table.take(np.sort(rng.choice(table.num_rows, n, replace=False)))
+    return table.to_pandas(), total_rows
+
+
+def sample_rows(data, columns, n, seed=0):
+    # A near-uniform row sample and the estimated row count of the file.
+    rng = np.random.default_rng(seed)
+    if columnar.detect_format(data) != "csv":
+        return sample_columnar_rows(data, columns, n, rng)
+    return sample_csv_rows(data, columns, n, rng)
+
+
+def bottom_k_positions(strata, sizes, seed=0):
+    # Stratified reservoir: every row gets a uniform random key and each
+    # stratum keeps its sizes[h] smallest keys. Merging two such reservoirs
+    # and re-taking the bottom k gives the same result as one pass.
+    keys = np.random.default_rng(seed).random(len(strata))
+    order = np.lexsort((keys, strata))
+    bounds = np.searchsorted(strata[order], np.arange(len(sizes) + 1))
+    return np.sort(np.concatenate([
+        order[bounds[h]:bounds[h] + sizes[h]] for h in range(len(sizes))
+    ]))
+
+
+def allocate(pool_counts, size, min_per_stratum=MIN_PER_STRATUM):
+    # Proportional allocation, with small strata kept up to the floor.
+    total = pool_counts.sum()
+    proportional = np.floor(size * pool_counts / total).astype(int) if total else pool_counts
+    return np.minimum(pool_counts, np.maximum(proportional, min_per_stratum))
+
+
+@dataclass
+class StratifiedSample:
+    # Sampled rows with their stratum codes, the estimated population size
+    # of each stratum, how many rows each stratum kept and the size of the
+    # uniform pool the stratum sizes were estimated from.
+    frame: pd.DataFrame
+    strata: np.ndarray
+    labels: pd.Index
+    population: np.ndarray
+    sampled: np.ndarray
+    pool_rows: int
+
+    @property
+    def nbytes(self):
+        return int(self.frame.memory_usage(deep=True).sum()) + self.strata.nbytes
+
+    @property
+    def total_rows(self):
+        return float(self.population.sum())
+
+    @property
+    def weights(self):
+        return (self.population / np.maximum(self.sampled, 1))[self.strata]
+
+    def domain_totals(self, values, domains=None, n_domains=1):
+        # Estimated population totals of `values` per domain code, with 95%
+        # half-widths from the two-phase variance: within-stratum sampling
+        # plus the error in the stratum shares estimated from the pool.
+        values = np.asarray(values, dtype="float64")
+        if domains is None:
+            domains = np.zeros(len(values), dtype=int)
+        n_strata = len(self.population)
+        cell = domains.astype("int64") * n_strata + self.strata
+        s1 = np.bincount(cell, weights=values, minlength=n_domains * n_strata).reshape(n_domains, n_strata)
+        s2 = np.bincount(cell, weights=values ** 2, minlength=n_domains * n_strata).reshape(n_domains, n_strata)
+        k = np.maximum(self.sampled, 1).astype("float64")
+        mean = s1 / k
+        var = np.where(self.sampled > 1, (s2 - k * mean ** 2) / np.maximum(k - 1, 1), 0.0)
+        finite = 1 - np.minimum(self.sampled / np.maximum(self.population, 1), 1)
+        estimate = (self.population * mean).sum(axis=1)
+        variance = (self.population ** 2 * finite * np.maximum(var, 0) / k).sum(axis=1)
+        total = self.population.sum()
+        if total and self.pool_rows:
+            shares = self.population / total
+            overall = (shares * mean).sum(axis=1, keepdims=True)
+            variance += total ** 2 * (shares * (mean - overall) ** 2).sum(axis=1) / self.pool_rows
+        return estimate, Z_95 * np.sqrt(variance)
+
+    def subset(self, keep):
+        # Restricts to whole strata, e.g. the regions selected in a filter.
+        keep_rows = np.isin(self.strata, np.flatnonzero(keep))
+        population = np.where(keep, self.population, 0)
+        sampled = np.where(keep, self.sampled, 0)
+        return StratifiedSample(
+            self.frame[keep_rows], self.strata[keep_rows], self.labels, population, sampled, self.pool_rows
+        )
+
+
+def stratified_sample(pool, strata_values, total_rows, size=PREVIEW_ROWS, min_per_stratum=MIN_PER_STRATUM, seed=0):
+    # Draws the stratified reservoir from a uniform pool of rows. Stratum
+    # sizes are the pool's shares scaled to the file's row count.
+    codes, labels = pd.factorize(strata_values, sort=True)
+    labelled = codes >= 0
+    pool, codes = pool[labelled], codes[labelled]
+    pool_counts = np.bincount(codes, minlength=len(labels))
+    sampled = allocate(pool_counts, size, min_per_stratum)
+    positions = bottom_k_positions(codes, sampled, seed)
+    scale = max(total_rows, len(pool)) / len(pool) if len(pool) else 0
+    return StratifiedSample(
+        frame=pool.iloc[positions],
+        strata=codes[positions],
+        labels=pd.Index(labels),
+        population=pool_counts * scale,
+        sampled=sampled,
+        pool_rows=len(pool),
+    )
+
+
+def weighted_quantile(values, weights, q):
+    values = np.asarray(values, dtype="float64")
+    order = np.argsort(values, kind="stable")
+    cumulative = np.cumsum(np.asarray(weights, dtype="float64")[order])
+    if not len(cumulative):
+        return np.full(len(np.atleast_1d(q)), np.nan)
+    picked = np.searchsorted(cumulative, np.atleast_1d(q) * cumulative[-1], side="left")
+    return values[order][np.minimum(picked, len(values) - 1)]
@@ -0,0 +1,114 @@
+import numpy as np
+
+# Capacity shrink factor between adjacent KLL levels.
+LEVEL_DECAY = 2 / 3
+
+
+class QuantileSketch:
+    # KLL-style mergeable quantile sketch. Ranks are accurate to roughly
+    # `error` * n with high probability, in O(log(n) / error) memory, and
+    # sketches built over separate chunks or processes can be merged. Until
+    # more than k items arrive nothing is compacted and quantiles are exact;
+    # passing k >= n makes an exact summary of an in-memory column.
+
+    def __init__(self, error=0.01, seed=None, k=None):
+        self.error = error
+        self.k = max(8, int(k) if k else int(np.ceil(2 / error)))
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def exact(self):
+        return len(self.levels) == 1
+
+    @property
+    def nbytes(self):
+        return sum(items.nbytes for items in self.levels)
+
+    def capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * LEVEL_DECAY ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.n += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind; the rest halve into the next
+                # level, keeping every other item from a random offset.
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(keep)]
+                promoted = paired[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def weighted_items(self):
+        # Retained items and the number of inputs each stands for.
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(level_items), 2 ** level, dtype="float64")
+            for level, level_items in enumerate(self.levels)
+        ])
+        return items, weights
+
+    def _weighted_items(self):
+        items, weights = self.weighted_items()
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        q = np.atleast_1d(np.asarray(q, dtype="float64"))
+        if not self.n:
+            return np.full(len(q), np.nan)
+        if self.exact:
+            # Linearly interpolated, as pandas and np.quantile do.
+            return np.quantile(self.levels[0], q)
+        items, cumulative = self._weighted_items()
+        picked = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        result = items[np.minimum(picked, len(items) - 1)]
+        result[q <= 0] = self.min
+        result[q >= 1] = self.max
+        return result
+
+    def rank(self, values):
+        # Estimated fraction of items <= each value.
+        values = np.atleast_1d(np.asarray(values, dtype="float64"))
+        if not self.n:
+            return np.zeros(len(values))
+        items, cumulative = self._weighted_items()
+        below = np.searchsorted(items, values, side="right")
+        counts = np.where(below > 0, cumulative[np.maximum(below - 1, 0)], 0)
+        return counts / cumulative[-1]
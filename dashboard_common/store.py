@@ -0,0 +1,106 @@
+import hashlib
+import threading
+import weakref
+
+from .cache import LRUCache, approx_nbytes
+
+MEMINFO_PATH = "/proc/meminfo"
+DEFAULT_MIN_AVAILABLE_MB = 256
+
+
+def content_hash(data):
+    # Store key for an upload: identical bytes give the same key.
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def available_memory():
+    # MemAvailable in bytes, or None where /proc/meminfo does not exist.
+    try:
+        with open(MEMINFO_PATH) as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class DatasetHandle:
+    # One reference to a store entry. The reference is released when the
+    # handle is released or garbage-collected, e.g. with its session state.
+
+    def __init__(self, store, key, value):
+        self.key = key
+        self.value = value
+        self._finalizer = weakref.finalize(self, store.release, key)
+
+    def release(self):
+        self._finalizer()
+
+
+class DatasetStore(LRUCache):
+    # Process-wide, content-addressed store shared by every Streamlit
+    # session. Identical uploads resolve to the same key and so to one
+    # parsed frame; pandas copy-on-write keeps the shared frames read-only.
+    # Entries held by a live session are pinned; the rest stay in LRU order
+    # within the byte budget and are dropped first when the host runs low
+    # on memory.
+
+    def __init__(self, max_bytes, min_available_bytes=DEFAULT_MIN_AVAILABLE_MB * 1024 * 1024, sizeof=approx_nbytes):
+        super().__init__(max_bytes, sizeof)
+        self.min_available_bytes = min_available_bytes
+        self._refs = {}
+        self._loading = {}
+
+    def _evictable(self, key):
+        return not self._refs.get(key)
+
+    def pinned(self, key):
+        return bool(self._refs.get(key))
+
+    def acquire(self, key, loader):
+        # Concurrent sessions asking for the same key wait for one load. A
+        # pinned entry is kept even when it alone exceeds the byte budget,
+        # so sessions never hold separate copies of one upload. The per-key
+        # lock is shared until its last waiter leaves, whether the load
+        # succeeded or failed, so a newcomer never loads next to a waiter.
+        with self._lock:
+            loading = self._loading.setdefault(key, [threading.Lock(), 0])
+            loading[1] += 1
+        try:
+            with loading[0]:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        self._entries.move_to_end(key)
+                        self._refs[key] = self._refs.get(key, 0) + 1
+                        return DatasetHandle(self, key, entry[0])
+                self.relieve_pressure()
+                value = loader()
+                with self._lock:
+                    self._refs[key] = self._refs.get(key, 0) + 1
+                self.put(key, value)
+        finally:
+            with self._lock:
+                loading[1] -= 1
+                if not loading[1]:
+                    del self._loading[key]
+        return DatasetHandle(self, key, value)
+
+    def release(self, key):
+        with self._lock:
+            refs = self._refs.get(key, 0) - 1
+            if refs > 0:
+                self._refs[key] = refs
+            else:
+                self._refs.pop(key, None)
+                self._shrink(self.max_bytes)
+
+    def relieve_pressure(self):
+        # Frees unpinned entries worth the shortfall below the
+        # MemAvailable floor.
+        available = available_memory()
+        if available is None or available >= self.min_available_bytes:
+            return
+        with self._lock:
+            self._shrink(max(self.current_bytes - (self.min_available_bytes - available), 0))
@@ -0,0 +1,71 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from dashboard_common.rendering import encode_figure
+
+GRID_COLUMNS = 3
+
+
+def use_agg():
+    matplotlib.use("Agg")
+
+
+def chart_pool(workers=None):
+    # Spawned rather than forked, since the dashboard process runs server
+    # threads; each worker draws off-screen with Agg.
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=use_agg
+    )
+
+
+def plot_metric_risk(metric, risk_counts):
+    fig, ax = plt.subplots(figsize=(5, 3.5))
+    risk_counts.plot(kind="bar", ax=ax)
+    ax.set_title(f"{metric} Risk Groups")
+    ax.set_xlabel(f"{metric} quartile")
+    ax.set_ylabel("Patients")
+    fig.tight_layout()
+    return fig
+
+
+def encode_metric_chart(metric, risk_counts, dpi=None):
+    return encode_figure(plot_metric_risk(metric, risk_counts), "png", dpi)
+
+
+def render_metric_charts(renderer, pool, jobs):
+    # jobs maps metric -> (chart key, risk counts). Charts already in the
+    # renderer's cache are reused; the rest are drawn concurrently.
+    encoded = {}
+    pending = {}
+    for metric, (key, risk_counts) in jobs.items():
+        cached = renderer.images.get((key, "png"))
+        if cached is None:
+            pending[metric] = pool.submit(encode_metric_chart, metric, risk_counts, renderer.dpi)
+        else:
+            encoded[metric] = cached
+    for metric, future in pending.items():
+        encoded[metric] = renderer.store(jobs[metric][0], future.result())
+    return {metric: encoded[metric] for metric in jobs}
+
+
+def comparison_table(stats, high_threshold):
+    rows = {}
+    for metric, s in stats.items():
+        risk = s.risk_counts
+        top_rate = float("nan")
+        if risk is not None and "Disease" in risk:
+            very_high = risk.loc["Very High"]
+            top_rate = very_high["Disease"] / very_high.sum() * 100 if very_high.sum() else float("nan")
+        rows[metric] = {
+            "Patients": s.total,
+            "Disease Rate (%)": s.disease_rate,
+            "Mean": s.mean,
+            "Median": s.quartile_edges[2],
+            f"Above {high_threshold}": s.high_count,
+            "Very High Group Disease Rate (%)": top_rate,
+        }
+    return pd.DataFrame.from_dict(rows, orient="index")
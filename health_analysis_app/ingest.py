@@ -0,0 +1,116 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from dashboard_common import columnar
+from dashboard_common.dtypes import optimise_frame
+from dashboard_common.profiling import stage
+from utils import DISEASE_LABELS
+
+DEFAULT_CACHE_MB = 512
+APPROX_CHUNK_ROWS = 1_000_000
+DISEASE_LABEL_DTYPE = pd.CategoricalDtype(sorted(DISEASE_LABELS))
+
+
+def read_preview(data, nrows=5):
+    if columnar.detect_format(data) != "csv":
+        return columnar.read_preview(data, nrows)
+    return pd.read_csv(io.BytesIO(data), nrows=nrows)
+
+
+def upload_schema(data):
+    # Column names plus the numeric ones. Columnar files answer from their
+    # schema; a CSV has to be parsed to infer types, so the parsed frame is
+    # returned for reuse, with narrowed dtypes (DtypeReport in df.attrs).
+    if columnar.detect_format(data) == "csv":
+        with stage("read_csv"):
+            df = pd.read_csv(io.BytesIO(data))
+        with stage("optimise dtypes"):
+            df = optimise_frame(df)[0]
+        return df, df.columns.tolist(), df.select_dtypes(include="number").columns.tolist()
+    pa = columnar.import_pyarrow()
+    schema = columnar.read_schema(data)
+    numeric = [
+        field.name for field in schema
+        if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+    ]
+    return None, schema.names, numeric
+
+
+def load_numeric_column(data, column, df=None):
+    with stage(f"read {column}"):
+        values = df[column] if df is not None else columnar.read_frame(data, [column])[column]
+    with stage(f"coerce {column}"):
+        return pd.to_numeric(values, errors="coerce")
+
+
+def build_health_frame(disease, feature, disease_col, feature_col):
+    with stage("build health frame"):
+        df = pd.DataFrame({disease_col: disease, feature_col: feature})
+        df = df.dropna(subset=[disease_col, feature_col])
+        df["Disease_Label"] = df[disease_col].map(dict(enumerate(DISEASE_LABELS))).astype(DISEASE_LABEL_DTYPE)
+        return df
+
+
+def iter_health_chunks(data, disease_col, feature_col, chunksize=APPROX_CHUNK_ROWS):
+    # (disease, feature) arrays per chunk of the upload, cleaned as
+    # build_health_frame cleans the whole frame. Only the two columns are
+    # read, and never all at once.
+    columns = list(dict.fromkeys([disease_col, feature_col]))
+    if columnar.detect_format(data) != "csv":
+        chunks = columnar.iter_frames(data, columns, chunksize)
+    else:
+        chunks = pd.read_csv(io.BytesIO(data), usecols=columns, chunksize=chunksize)
+    for chunk in chunks:
+        disease = pd.to_numeric(chunk[disease_col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        feature = pd.to_numeric(chunk[feature_col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        keep = ~(np.isnan(disease) | np.isnan(feature))
+        yield disease[keep], feature[keep]
+
+
+# The stages below are memoised separately in one byte-bounded LRU, so a new
+# "Health Metric" only parses and coerces that one column; the upload's
+# schema and the disease column are reused. Cached frames are shared between
+# reruns and sessions and must not be modified in place.
+
+def cached_schema(cache, data, data_hash):
+    return cache.get_or_load((data_hash, "schema"), lambda: upload_schema(data))
+
+
+def acquire_schema(store, data, data_hash):
+    # Same entry as cached_schema, pinned in a DatasetStore for as long as
+    # the returned handle is held.
+    return store.acquire((data_hash, "schema"), lambda: upload_schema(data))
+
+
+def cached_numeric_column(cache, data, data_hash, column):
+    def load():
+        full_df = cached_schema(cache, data, data_hash)[0]
+        return load_numeric_column(data, column, full_df)
+
+    return cache.get_or_load((data_hash, "column", column), load)
+
+
+def cached_health_frame(cache, data, data_hash, disease_col, feature_col):
+    def build():
+        disease = cached_numeric_column(cache, data, data_hash, disease_col)
+        feature = cached_numeric_column(cache, data, data_hash, feature_col)
+        return build_health_frame(disease, feature, disease_col, feature_col)
+
+    return cache.get_or_load((data_hash, "frame", disease_col, feature_col), build)
+
+
+def cached_metric_block(cache, data, data_hash, disease_col, metric_cols):
+    # Disease column plus a block of metric columns, for comparing metrics
+    # side by side. Rows without a disease value are dropped; missing metric
+    # values are left as NaN and handled per metric.
+    def build():
+        disease = cached_numeric_column(cache, data, data_hash, disease_col)
+        block = pd.concat(
+            {col: cached_numeric_column(cache, data, data_hash, col) for col in metric_cols}, axis=1
+        )
+        keep = disease.notna().to_numpy()
+        return disease[keep], block[keep]
+
+    return cache.get_or_load((data_hash, "block", disease_col, tuple(metric_cols)), build)
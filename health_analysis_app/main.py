@@ -1,62 +1,180 @@
 import streamlit as st
-import pandas as pd
 import matplotlib.pyplot as plt
-import io, base64
-from utils import calculate_health_kpis
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
+import os
+import sys
+import time
+from concurrent.futures import wait
 
-st.set_page_config(page_title="Health Dashboard", layout="wide")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from dashboard_common.app import (
+    RerunTimings, get_background_jobs, get_report_cache, read_static, session_dataset, upload_hash
+)
+from dashboard_common.columnar import UPLOAD_TYPES
+from dashboard_common.profiling import stage
+from dashboard_common.rendering import SectionRenderer, chart_key
+from dashboard_common.store import DEFAULT_MIN_AVAILABLE_MB, DatasetStore
+from comparison import GRID_COLUMNS, chart_pool, comparison_table, render_metric_charts
+from ingest import (
+    DEFAULT_CACHE_MB, acquire_schema, cached_health_frame, cached_metric_block, iter_health_chunks,
+    read_preview
+)
+from preview import preview_health_stats, preview_schema, sample_health_preview
+from report import build_health_report
+from utils import HIGH_THRESHOLD, health_stats, metric_block_stats, sketch_health
 
-with open("styles.css") as f:
-    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+st.set_page_config(page_title="Health Dashboard", layout="wide")
 
-with open("templates/header.html") as f:
-    st.markdown(f.read(), unsafe_allow_html=True)
+timings = RerunTimings("health")
 
-def render_section(title, subtitle, fig=None):
-    with open("templates/section.html") as f:
-        template = f.read()
+st.markdown(f"<style>{read_static('styles.css')}</style>", unsafe_allow_html=True)
+st.markdown(read_static("templates/header.html"), unsafe_allow_html=True)
 
-    if fig:
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", bbox_inches="tight", dpi=120)
-        buf.seek(0)
-        img_base64 = base64.b64encode(buf.read()).decode()
-        content = f'<img src="data:image/png;base64,{img_base64}" width="100%"/>'
-    else:
-        content = "<p>No data available</p>"
+@st.cache_resource
+def get_renderer():
+    return SectionRenderer("templates/section.html", dpi=120)
 
-    html = (
-        template.replace("{{ section_title }}", title)
-                .replace("{{ section_subtitle }}", subtitle)
-                .replace("{{ section_content }}", content)
-    )
+def render_section(title, subtitle, key=None, plot=None):
+    html, png = get_renderer().render(title, subtitle, key, plot)
     st.markdown(html, unsafe_allow_html=True)
+    return png
 
-uploaded_file = st.file_uploader("Upload Health Dataset (CSV)", type=["csv"])
+@st.cache_resource
+def get_ingest_cache():
+    # One store per server process, so concurrent sessions share datasets.
+    budget_mb = int(os.environ.get("HEALTH_INGEST_CACHE_MB", DEFAULT_CACHE_MB))
+    floor_mb = int(os.environ.get("HEALTH_MIN_AVAILABLE_MB", DEFAULT_MIN_AVAILABLE_MB))
+    return DatasetStore(budget_mb * 1024 * 1024, floor_mb * 1024 * 1024)
+
+@st.cache_resource
+def get_chart_pool():
+    workers = os.environ.get("HEALTH_CHART_WORKERS")
+    return chart_pool(int(workers) if workers else None)
+
+uploaded_file = st.file_uploader("Upload Health Dataset (CSV, Parquet or Arrow)", type=UPLOAD_TYPES)
 
 if uploaded_file:
-    df = pd.read_csv(uploaded_file)
+    with stage("read upload"):
+        data = uploaded_file.getvalue()
     st.subheader("Dataset Preview")
-    st.dataframe(df.head())
+    st.dataframe(read_preview(data))
 
+    # Parquet and Arrow files are only read for the two mapped columns.
+    with stage("hash upload"):
+        data_hash = upload_hash(uploaded_file, data)
+    cache = get_ingest_cache()
+    # Fast preview answers from a disease-stratified sample while the exact
+    # statistics are computed in the background; the rerun after they land
+    # swaps them in. Until the upload is parsed, the column lists come from
+    # a small sample too.
+    fast_preview = st.sidebar.checkbox("Fast preview (sampled)")
+    # Large datasets can trade exact quartiles for a bounded-error sketch,
+    # streamed from the upload two columns and one chunk at a time. Nothing
+    # is parsed in full for it, so the column lists are sampled as well.
+    approximate = st.sidebar.checkbox("Approximate quantiles (large data)")
+    error = None
+    if approximate:
+        error = st.sidebar.slider("Quantile error bound", 0.001, 0.05, 0.01, step=0.001, format="%.3f")
+    if (fast_preview or approximate) and (data_hash, "schema") not in cache:
+        full_df = None
+        columns, numeric_cols = cache.get_or_load((data_hash, "preview_schema"), lambda: preview_schema(data))
+    else:
+        full_df, columns, numeric_cols = session_dataset(
+            "schema", (data_hash, "schema"), lambda: acquire_schema(cache, data, data_hash)
+        )
     st.sidebar.header("Column Mapping")
-    disease_col = st.sidebar.selectbox("Disease Column (0/1)", df.columns)
-
-    numeric_cols = df.select_dtypes(include=["int64", "float64"]).columns.tolist()
+    disease_col = st.sidebar.selectbox("Disease Column (0/1)", columns)
     feature_col = st.sidebar.selectbox("Health Metric", numeric_cols)
+    if full_df is not None and "dtype_report" in full_df.attrs:
+        st.sidebar.caption(full_df.attrs["dtype_report"].summary())
+
+    # Comparison mode: every selected metric from one pass over the column
+    # block, with the charts drawn in parallel and laid out in a grid.
+    if st.sidebar.checkbox("Compare several metrics"):
+        candidates = [col for col in numeric_cols if col != disease_col]
+        metric_cols = st.sidebar.multiselect("Metrics", candidates, default=candidates)
+        if not metric_cols:
+            st.info("Select at least one metric to compare.")
+            timings.stop()
+
+        disease, block = cached_metric_block(cache, data, data_hash, disease_col, metric_cols)
+        with stage("metric block stats"):
+            all_stats = cache.get_or_load(
+                (data_hash, "block_stats", disease_col, tuple(metric_cols)),
+                lambda: metric_block_stats(disease, block),
+            )
+
+        st.subheader("Metric Comparison")
+        st.dataframe(comparison_table(all_stats, HIGH_THRESHOLD).round(2))
 
-    df[disease_col] = pd.to_numeric(df[disease_col], errors="coerce")
-    df[feature_col] = pd.to_numeric(df[feature_col], errors="coerce")
-    df = df.dropna(subset=[disease_col, feature_col])
-    df["Disease_Label"] = df[disease_col].map({0: "No Disease", 1: "Disease"})
+        jobs = {
+            metric: (chart_key(s.risk_counts, metric, "risk_bar"), s.risk_counts)
+            for metric, s in all_stats.items()
+            if s.risk_counts is not None and not s.risk_counts.empty
+        }
+        renderer = get_renderer()
+        with stage("parallel chart rendering"):
+            encoded = render_metric_charts(renderer, get_chart_pool(), jobs)
+        grid = st.columns(GRID_COLUMNS)
+        for i, metric in enumerate(metric_cols):
+            content = encoded[metric][1] if metric in encoded else "<p>No data available</p>"
+            grid[i % GRID_COLUMNS].markdown(renderer.section_html(
+                section_title=metric,
+                section_subtitle="Disease prevalence by risk group",
+                section_content=content,
+            ), unsafe_allow_html=True)
+        timings.stop()
+
+    # Previews cover the exact statistics; the sketch is already the fast path.
+    stats_key = (data_hash, "stats", disease_col, feature_col)
+    exact_job = None
+    if fast_preview and not approximate and stats_key not in cache:
+        def load_exact():
+            frame = cached_health_frame(cache, data, data_hash, disease_col, feature_col)
+            return cache.get_or_load(stats_key, lambda: health_stats(frame[disease_col], frame[feature_col]))
+
+        exact_job = get_background_jobs().submit(stats_key, load_exact)
+    previewing = exact_job is not None and not exact_job.done()
+
+    errors = None
+    if previewing:
+        with stage("preview sample"):
+            sample = cache.get_or_load(
+                (data_hash, "preview", disease_col, feature_col),
+                lambda: sample_health_preview(data, disease_col, feature_col),
+            )
+        with stage("preview estimates"):
+            stats, errors = preview_health_stats(sample, disease_col, feature_col)
+        # Within a disease stratum the sampled rows are equally weighted, so
+        # the per-label boxplot can be drawn from the sample as is.
+        df = sample.frame
+    elif approximate:
+        with stage("quantile sketch"):
+            sketch = cache.get_or_load(
+                (data_hash, "sketch", disease_col, feature_col, error),
+                lambda: sketch_health(iter_health_chunks(data, disease_col, feature_col), error),
+            )
+            stats = sketch.stats()
+    else:
+        df = cached_health_frame(cache, data, data_hash, disease_col, feature_col)
+        if exact_job is not None:
+            # Finished, but too large for the cache.
+            stats = exact_job.result()
+        else:
+            with stage("health stats"):
+                stats = cache.get_or_load(
+                    stats_key, lambda: health_stats(df[disease_col], df[feature_col])
+                )
 
-    total, rate, avg, high = calculate_health_kpis(
-        df, feature_col, feature_col, disease_col
-    )
+    total, rate, avg, high = stats.total, stats.disease_rate, stats.mean, stats.high_count
 
+    if previewing:
+        st.info(
+            f"Estimates from a stratified sample of {len(sample.frame):,} rows, with 95% intervals. "
+            "Exact results replace them automatically."
+        )
     col1, col2, col3, col4 = st.columns(4)
     kpis = [
         ("Total Patients", total),
@@ -64,6 +182,13 @@ if uploaded_file:
         (f"Avg {feature_col}", f"{avg:.2f}"),
         (f"High {feature_col}", high),
     ]
+    if errors is not None:
+        kpis = [
+            ("Total Patients", f"~{total:,}"),
+            ("Disease Rate (%)", f"{rate:.2f} ± {errors['disease_rate']:.2f}"),
+            (f"Avg {feature_col}", f"{avg:.2f} ± {errors['mean']:.2f}"),
+            (f"High {feature_col}", f"{high:,} ± {errors['high_count']:,.0f}"),
+        ]
 
     for col, (title, value) in zip([col1, col2, col3, col4], kpis):
         col.markdown(
@@ -76,41 +201,69 @@ if uploaded_file:
             unsafe_allow_html=True
         )
 
-    fig, ax = plt.subplots(figsize=(6, 4))
-    df["Disease_Label"].value_counts().plot(kind="bar", ax=ax)
-    ax.set_title("Disease Distribution")
-    ax.set_xlabel("Status")
-    ax.set_ylabel("Patients")
-    fig.tight_layout()
-    render_section("Disease Distribution", "Overall health condition spread", fig)
-
-    fig, ax = plt.subplots(figsize=(6, 4))
-    df.boxplot(column=feature_col, by="Disease_Label", ax=ax)
-    ax.set_title(f"{feature_col} vs Disease")
-    ax.set_xlabel("Disease Status")
-    ax.set_ylabel(feature_col)
-    plt.suptitle("")
-    fig.tight_layout()
-    render_section(
-        f"{feature_col} Analysis",
-        f"Distribution of {feature_col} across disease status",
-        fig
-    )
-
-    try:
-        df["Risk_Group"] = pd.qcut(
-            df[feature_col], 4, labels=["Low", "Medium", "High", "Very High"]
-        )
-        risk = df.groupby("Risk_Group")["Disease_Label"].value_counts().unstack()
+    chart_pngs = []
+    disease_counts = stats.disease_counts
+    disease_error = None if errors is None else errors["disease_counts"]
 
+    def plot_disease_distribution():
         fig, ax = plt.subplots(figsize=(6, 4))
-        risk.plot(kind="bar", ax=ax)
-        ax.set_title("Disease Prevalence by Risk Group")
+        disease_counts.plot(kind="bar", ax=ax, yerr=disease_error, capsize=4)
+        ax.set_title("Disease Distribution")
+        ax.set_xlabel("Status")
         ax.set_ylabel("Patients")
         fig.tight_layout()
-        render_section("Risk Group Analysis", "Disease prevalence by feature level", fig)
-    except:
-        pass
+        return fig
+
+    if not disease_counts.empty:
+        chart_pngs.append(render_section(
+            "Disease Distribution", "Overall health condition spread",
+            chart_key(disease_counts, disease_error, "disease_bar"), plot_disease_distribution
+        ))
+    else:
+        render_section("Disease Distribution", "Overall health condition spread")
+
+    def plot_feature_boxplot():
+        fig, ax = plt.subplots(figsize=(6, 4))
+        if approximate:
+            ax.bxp(sketch.box_stats())
+            ax.grid(True)
+        else:
+            df.boxplot(column=feature_col, by="Disease_Label", ax=ax)
+        ax.set_title(f"{feature_col} vs Disease")
+        ax.set_xlabel("Disease Status")
+        ax.set_ylabel(feature_col)
+        fig.suptitle("")
+        fig.tight_layout()
+        return fig
+
+    # The boxplot depends on every row, so it is keyed on the upload itself.
+    if not disease_counts.empty:
+        chart_pngs.append(render_section(
+            f"{feature_col} Analysis",
+            f"Distribution of {feature_col} across disease status",
+            chart_key(data_hash, disease_col, feature_col, error, previewing, "feature_boxplot"),
+            plot_feature_boxplot
+        ))
+    else:
+        render_section(
+            f"{feature_col} Analysis", f"Distribution of {feature_col} across disease status"
+        )
+
+    risk = stats.risk_counts
+    risk_error = None if errors is None else errors["risk_counts"]
+    if risk is not None and not risk.empty:
+        def plot_risk_groups():
+            fig, ax = plt.subplots(figsize=(6, 4))
+            risk.plot(kind="bar", ax=ax, yerr=risk_error, capsize=3)
+            ax.set_title("Disease Prevalence by Risk Group")
+            ax.set_ylabel("Patients")
+            fig.tight_layout()
+            return fig
+
+        chart_pngs.append(render_section(
+            "Risk Group Analysis", "Disease prevalence by feature level",
+            chart_key(risk, risk_error, "risk_bar"), plot_risk_groups
+        ))
 
     st.markdown("Actionable Insights")
 
@@ -120,32 +273,32 @@ if uploaded_file:
     - Preventive screenings should focus on **High & Very High risk groups**.
     """)
 
-    if st.button("Generate Health Report"):
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-        elements = []
-
-        elements.append(Paragraph("Health Analytics Report", styles['Title']))
-        elements.append(Spacer(1, 12))
-        elements.append(Paragraph(f"Total Patients: {total}", styles['Normal']))
-        elements.append(Paragraph(f"Disease Rate: {rate:.2f}%", styles['Normal']))
-        elements.append(Paragraph(f"Average {feature_col}: {avg:.2f}", styles['Normal']))
-        elements.append(Spacer(1, 12))
-
-        for fig in plt.get_fignums():
-            buf = io.BytesIO()
-            plt.figure(fig).savefig(buf, format="png", bbox_inches="tight")
-            buf.seek(0)
-            elements.append(Image(buf, width=400, height=250))
-            elements.append(Spacer(1, 12))
-
-        doc.build(elements)
-        buffer.seek(0)
+    if previewing:
+        # Reports are only built from exact results.
+        timings.report()
+        status = st.empty()
+        started = time.monotonic()
+        while not exact_job.done():
+            status.caption(f"Computing exact results… {time.monotonic() - started:.0f}s")
+            wait([exact_job], timeout=0.5)
+        st.rerun()
 
+    # PDF report, built only on request from the images shown above and
+    # cached per dataset and column/quantile settings
+    report_key = (data_hash, disease_col, feature_col, error)
+    report_cache = get_report_cache("health")
+    pdf_bytes = report_cache.get(report_key)
+    if pdf_bytes is None and st.button("Generate Health Report"):
+        pdf_bytes = report_cache.put(
+            report_key, build_health_report(total, rate, avg, feature_col, chart_pngs)
+        )
+
+    if pdf_bytes is not None:
         st.download_button(
             "Download PDF",
-            buffer,
+            pdf_bytes,
             file_name="health_report.pdf",
             mime="application/pdf"
         )
+
+timings.report()
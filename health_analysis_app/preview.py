@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from dashboard_common.sampling import POOL_FACTOR, PREVIEW_ROWS, sample_rows, stratified_sample, weighted_quantile
+from ingest import build_health_frame
+from utils import DISEASE_LABELS, HIGH_THRESHOLD, HealthStats, disease_codes, label_counts_series, risk_frame
+
+
+def preview_schema(data, size=2_000):
+    # Column names and numeric columns from a small row sample, so the
+    # sidebar can be filled before the whole upload is parsed.
+    sample, _ = sample_rows(data, None, size)
+    return sample.columns.tolist(), sample.select_dtypes(include="number").columns.tolist()
+
+
+def sample_health_preview(data, disease_col, feature_col, size=PREVIEW_ROWS, seed=0):
+    # Stratified by the disease value, so the rarer class keeps enough rows
+    # for its boxplot and risk-group estimates.
+    columns = list(dict.fromkeys([disease_col, feature_col]))
+    pool, total_rows = sample_rows(data, columns, size * POOL_FACTOR, seed)
+    raw_rows = len(pool)
+    pool = build_health_frame(
+        pd.to_numeric(pool[disease_col], errors="coerce"), pd.to_numeric(pool[feature_col], errors="coerce"),
+        disease_col, feature_col,
+    )
+    valid_rows = total_rows * len(pool) / raw_rows if raw_rows else 0
+    return stratified_sample(pool, pool[disease_col], valid_rows, size)
+
+
+def preview_health_stats(sample, disease_col, feature_col, high_threshold=HIGH_THRESHOLD):
+    # HealthStats estimated from the sample, plus 95% half-widths for the
+    # tiles, the disease split and the risk-group counts.
+    df = sample.frame
+    disease = df[disease_col].to_numpy(dtype="float64")
+    feature = df[feature_col].to_numpy(dtype="float64")
+    n = sample.total_rows
+    ones = np.ones(len(df))
+    codes = disease_codes(disease)
+    labelled = codes >= 0
+
+    disease_total, disease_error = sample.domain_totals(disease)
+    feature_total, feature_error = sample.domain_totals(feature)
+    high, high_error = sample.domain_totals((feature > high_threshold).astype("float64"))
+    label_counts, label_error = sample.domain_totals(ones, np.where(labelled, codes, 2), 3)
+    label_counts, label_error = label_counts[:2], label_error[:2]
+
+    edges = weighted_quantile(feature, sample.weights, [0, 0.25, 0.5, 0.75, 1])
+    if len(feature):
+        edges[0], edges[-1] = feature.min(), feature.max()
+    risk_counts = risk_error = None
+    if len(feature) and np.all(np.diff(edges) > 0):
+        groups = np.searchsorted(edges[1:-1], feature, side="left")
+        cells, cell_error = sample.domain_totals(ones, np.where(labelled, groups * 2 + codes, 8), 9)
+        rounded_labels = np.rint(label_counts).astype("int64")
+        risk_counts = risk_frame(np.rint(cells[:8]).reshape(4, 2).astype("int64"), rounded_labels)
+        risk_error = risk_frame(cell_error[:8].reshape(4, 2), rounded_labels)
+
+    stats = HealthStats(
+        total=int(round(n)),
+        disease_rate=disease_total[0] / n * 100 if n else np.nan,
+        mean=feature_total[0] / n if n else np.nan,
+        high_count=int(round(high[0])),
+        disease_counts=label_counts_series(np.rint(label_counts).astype("int64")),
+        quartile_edges=edges,
+        risk_counts=risk_counts,
+    )
+    disease_counts = stats.disease_counts
+    errors = {
+        "disease_rate": disease_error[0] / n * 100 if n else np.nan,
+        "mean": feature_error[0] / n if n else np.nan,
+        "high_count": high_error[0],
+        "disease_counts": pd.Series(
+            label_error, index=pd.Index(DISEASE_LABELS, name="Disease_Label")
+        ).loc[disease_counts.index],
+        "risk_counts": risk_error,
+    }
+    return stats, errors
@@ -0,0 +1,32 @@
+import io
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer
+
+from dashboard_common.profiling import stage
+
+
+def build_health_report(total, disease_rate, mean, feature_col, chart_pngs):
+    # chart_pngs are the encoded images already shown on the page, so the
+    # report never touches matplotlib. invariant=1 drops the timestamp and
+    # random document ID, so the same inputs always give the same bytes.
+    pdf_buffer = io.BytesIO()
+    doc = SimpleDocTemplate(pdf_buffer, pagesize=A4, invariant=1)
+    styles = getSampleStyleSheet()
+    elements = []
+
+    elements.append(Paragraph("Health Analytics Report", styles['Title']))
+    elements.append(Spacer(1, 12))
+    elements.append(Paragraph(f"Total Patients: {total}", styles['Normal']))
+    elements.append(Paragraph(f"Disease Rate: {disease_rate:.2f}%", styles['Normal']))
+    elements.append(Paragraph(f"Average {feature_col}: {mean:.2f}", styles['Normal']))
+    elements.append(Spacer(1, 12))
+
+    for png in chart_pngs:
+        elements.append(Image(io.BytesIO(png), width=400, height=250))
+        elements.append(Spacer(1, 12))
+
+    with stage("reportlab build"):
+        doc.build(elements)
+    return pdf_buffer.getvalue()
@@ -1,3 +1,32 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from dashboard_common.sketch import QuantileSketch
+
+HIGH_THRESHOLD = 30
+RISK_LABELS = ["Low", "Medium", "High", "Very High"]
+# Indexed by the 0/1 disease code.
+DISEASE_LABELS = ["No Disease", "Disease"]
+
+
+@dataclass
+class HealthStats:
+    total: int
+    disease_rate: float
+    mean: float
+    high_count: int
+    disease_counts: pd.Series
+    quartile_edges: np.ndarray
+    risk_counts: pd.DataFrame
+
+    @property
+    def nbytes(self):
+        risk = 0 if self.risk_counts is None else self.risk_counts.to_numpy().nbytes
+        return self.disease_counts.to_numpy().nbytes + self.quartile_edges.nbytes + risk
+
+
 def calculate_health_kpis(df, age_col, bmi_col, disease_col):
     total_patients = len(df)
     disease_rate = df[disease_col].mean() * 100
@@ -5,3 +34,199 @@ def calculate_health_kpis(df, age_col, bmi_col, disease_col):
     high_risk = df[df[bmi_col] > 30].shape[0]
 
     return total_patients, disease_rate, avg_age, high_risk
+
+
+def disease_codes(disease):
+    # 0 -> "No Disease", 1 -> "Disease", anything else unlabelled (-1).
+    codes = np.full(len(disease), -1, dtype=np.int8)
+    codes[disease == 0] = 0
+    codes[disease == 1] = 1
+    return codes
+
+
+def label_counts_series(label_counts):
+    order = np.argsort(-label_counts, kind="stable")
+    disease_counts = pd.Series(
+        label_counts[order], index=pd.Index(np.array(DISEASE_LABELS)[order], name="Disease_Label"), name="count"
+    )
+    return disease_counts[disease_counts > 0]
+
+
+def risk_frame(cells, label_counts):
+    present = label_counts > 0
+    return pd.DataFrame(
+        cells[:, present],
+        index=pd.CategoricalIndex(RISK_LABELS, categories=RISK_LABELS, ordered=True, name="Risk_Group"),
+        columns=pd.Index(np.array(DISEASE_LABELS)[present], name="Disease_Label"),
+    ).sort_index(axis=1)
+
+
+def health_stats(disease, feature, high_threshold=HIGH_THRESHOLD):
+    # Tiles, disease split, quartile edges and per-quartile disease counts
+    # from the two cleaned columns as plain arrays, with no grouped frames.
+    disease = np.asarray(disease, dtype="float64")
+    feature = np.asarray(feature, dtype="float64")
+    codes = disease_codes(disease)
+    labelled = codes >= 0
+
+    label_counts = np.bincount(codes[labelled], minlength=2)
+
+    edges = np.quantile(feature, [0, 0.25, 0.5, 0.75, 1]) if len(feature) else np.full(5, np.nan)
+    risk_counts = None
+    # pd.qcut refuses duplicate edges; so does the risk grouping.
+    if len(feature) and np.all(np.diff(edges) > 0):
+        groups = np.searchsorted(edges[1:-1], feature, side="left")
+        cells = np.bincount(groups[labelled] * 2 + codes[labelled], minlength=8).reshape(4, 2)
+        risk_counts = risk_frame(cells, label_counts)
+
+    return HealthStats(
+        total=len(feature),
+        disease_rate=disease.mean() * 100 if len(disease) else np.nan,
+        mean=feature.mean() if len(feature) else np.nan,
+        high_count=int(np.count_nonzero(feature > high_threshold)),
+        disease_counts=label_counts_series(label_counts),
+        quartile_edges=edges,
+        risk_counts=risk_counts,
+    )
+
+
+def metric_block_stats(disease, block, high_threshold=HIGH_THRESHOLD):
+    # health_stats for every column of a metric block in one pass over the
+    # 2-D array. Missing metric values drop out per column, as they do when
+    # each metric is cleaned on its own.
+    disease = np.asarray(disease, dtype="float64")
+    values = block.to_numpy(dtype="float64", na_value=np.nan)
+    n_rows, n_metrics = values.shape
+    valid = ~np.isnan(values)
+    codes = disease_codes(disease)
+    totals = valid.sum(axis=0)
+    disease_sums = np.where(valid, disease[:, None], 0).sum(axis=0)
+    feature_sums = np.where(valid, values, 0).sum(axis=0)
+    high_counts = np.count_nonzero(values > high_threshold, axis=0)
+
+    edges = np.full((5, n_metrics), np.nan)
+    has_rows = totals > 0
+    if has_rows.any():
+        edges[:, has_rows] = np.nanquantile(values[:, has_rows], [0, 0.25, 0.5, 0.75, 1], axis=0)
+    groups = np.zeros(values.shape, dtype=np.int8)
+    for edge in edges[1:-1]:
+        groups += values > edge
+
+    # One bincount gives the per-metric label split and quartile cells.
+    counted = valid & (codes >= 0)[:, None]
+    metric_index = np.broadcast_to(np.arange(n_metrics), values.shape)[counted]
+    label_codes = np.broadcast_to(codes[:, None], values.shape)[counted]
+    label_counts = np.bincount(metric_index * 2 + label_codes, minlength=n_metrics * 2).reshape(n_metrics, 2)
+    cells = np.bincount(
+        metric_index * 8 + groups[counted] * 2 + label_codes, minlength=n_metrics * 8
+    ).reshape(n_metrics, 4, 2)
+
+    stats = {}
+    for i, metric in enumerate(block.columns):
+        total = int(totals[i])
+        risk_counts = None
+        if total and np.all(np.diff(edges[:, i]) > 0):
+            risk_counts = risk_frame(cells[i], label_counts[i])
+        stats[metric] = HealthStats(
+            total=total,
+            disease_rate=disease_sums[i] / total * 100 if total else np.nan,
+            mean=feature_sums[i] / total if total else np.nan,
+            high_count=int(high_counts[i]),
+            disease_counts=label_counts_series(label_counts[i]),
+            quartile_edges=edges[:, i].copy(),
+            risk_counts=risk_counts,
+        )
+    return stats
+
+
+class HealthSketch:
+    # Streaming, mergeable counterpart of health_stats: exact sums and counts
+    # plus quantile sketches of the metric overall and per disease label.
+
+    def __init__(self, error=0.01):
+        self.error = error
+        self.overall = QuantileSketch(error)
+        self.by_label = [QuantileSketch(error), QuantileSketch(error)]
+        self.n = 0
+        self.disease_sum = 0.0
+        self.feature_sum = 0.0
+        self.high_count = 0
+
+    @property
+    def nbytes(self):
+        return self.overall.nbytes + sum(label_sketch.nbytes for label_sketch in self.by_label)
+
+    def update(self, disease, feature, high_threshold=HIGH_THRESHOLD):
+        disease = np.asarray(disease, dtype="float64")
+        feature = np.asarray(feature, dtype="float64")
+        codes = disease_codes(disease)
+        self.n += len(feature)
+        self.disease_sum += disease.sum()
+        self.feature_sum += feature.sum()
+        self.high_count += int(np.count_nonzero(feature > high_threshold))
+        self.overall.update(feature)
+        for code, label_sketch in enumerate(self.by_label):
+            label_sketch.update(feature[codes == code])
+        return self
+
+    def merge(self, other):
+        self.n += other.n
+        self.disease_sum += other.disease_sum
+        self.feature_sum += other.feature_sum
+        self.high_count += other.high_count
+        self.overall.merge(other.overall)
+        for mine, theirs in zip(self.by_label, other.by_label):
+            mine.merge(theirs)
+        return self
+
+    def stats(self):
+        label_counts = np.array([len(label_sketch) for label_sketch in self.by_label])
+        edges = self.overall.quantile([0, 0.25, 0.5, 0.75, 1])
+        risk_counts = None
+        if self.n and np.all(np.diff(edges) > 0):
+            # Per-quartile counts from each label's estimated ranks at the edges.
+            shares = np.column_stack([
+                np.diff(np.concatenate([[0], label_sketch.rank(edges[1:-1]), [1]]))
+                for label_sketch in self.by_label
+            ])
+            cells = np.rint(shares * label_counts).astype("int64")
+            risk_counts = risk_frame(cells, label_counts)
+        return HealthStats(
+            total=self.n,
+            disease_rate=self.disease_sum / self.n * 100 if self.n else np.nan,
+            mean=self.feature_sum / self.n if self.n else np.nan,
+            high_count=self.high_count,
+            disease_counts=label_counts_series(label_counts),
+            quartile_edges=edges,
+            risk_counts=risk_counts,
+        )
+
+    def box_stats(self):
+        # matplotlib bxp() input per label, in df.boxplot(by=...) order.
+        # Whiskers are clamped to the sketch's min/max; outliers are omitted.
+        boxes = []
+        for label in sorted(DISEASE_LABELS):
+            label_sketch = self.by_label[DISEASE_LABELS.index(label)]
+            if not len(label_sketch):
+                continue
+            q1, med, q3 = label_sketch.quantile([0.25, 0.5, 0.75])
+            iqr = q3 - q1
+            boxes.append({
+                "label": label,
+                "q1": q1,
+                "med": med,
+                "q3": q3,
+                "whislo": max(label_sketch.min, q1 - 1.5 * iqr),
+                "whishi": min(label_sketch.max, q3 + 1.5 * iqr),
+                "fliers": [],
+            })
+        return boxes
+
+
+def sketch_health(chunks, error=0.01):
+    # Folds (disease, feature) chunks into one sketch. Each chunk is sketched
+    # on its own and merged in, so only one chunk is ever held in memory.
+    sketch = HealthSketch(error)
+    for disease, feature in chunks:
+        sketch.merge(HealthSketch(error).update(disease, feature))
+    return sketch
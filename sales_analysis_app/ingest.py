@@ -0,0 +1,137 @@
+import io
+
+import pandas as pd
+
+from dashboard_common import columnar
+from dashboard_common.dtypes import optimise_frame
+from dashboard_common.profiling import stage
+from dashboard_common.store import content_hash
+from utils import merge_partials, region_partials
+
+DEFAULT_CACHE_MB = 512
+DEFAULT_CHUNK_ROWS = 500_000
+# Streamed partials are compacted after this many chunks, so memory tracks
+# the number of distinct keys rather than the number of chunks read.
+COMPACT_EVERY = 8
+
+
+def as_source(data):
+    return io.BytesIO(data) if isinstance(data, (bytes, bytearray, memoryview)) else data
+
+
+def read_preview(data, nrows=5):
+    if columnar.detect_format(data) != "csv":
+        return columnar.read_preview(data, nrows)
+    return pd.read_csv(as_source(data), nrows=nrows)
+
+
+def mapped_columns(mapping):
+    return list(dict.fromkeys(mapping.values()))
+
+
+def clean_sales_frame(df, mapping):
+    date_col, qty_col, price_col = mapping["date"], mapping["qty"], mapping["price"]
+    df["OrderDate"] = pd.to_datetime(df[date_col], errors="coerce")
+    df[qty_col] = pd.to_numeric(df[qty_col], errors="coerce")
+    df[price_col] = pd.to_numeric(df[price_col], errors="coerce")
+    df = df.dropna(subset=["OrderDate", qty_col, price_col])
+    df["Revenue"] = df[qty_col] * df[price_col]
+    return df
+
+
+def load_sales_frame(data, mapping):
+    # The cleaned frame is stored with narrowed dtypes; the DtypeReport is
+    # kept in df.attrs["dtype_report"].
+    with stage("read"):
+        if columnar.detect_format(data) != "csv":
+            df = columnar.read_frame(data, mapped_columns(mapping))
+        else:
+            df = pd.read_csv(as_source(data), usecols=mapped_columns(mapping))
+    with stage("coerce and clean"):
+        df = clean_sales_frame(df, mapping)
+    with stage("optimise dtypes"):
+        return optimise_frame(df)[0]
+
+
+def stream_dtypes(mapping):
+    # Order and date columns are read as plain strings, product and region
+    # straight into categoricals; quantity and price keep the C parser's
+    # numeric fast path and are coerced per chunk.
+    numeric = {mapping["qty"], mapping["price"]}
+    dtypes = {col: str for col in mapped_columns(mapping) if col not in numeric}
+    for role in ("product", "region"):
+        if mapping[role] not in numeric and mapping[role] not in (mapping["order"], mapping["date"]):
+            dtypes[mapping[role]] = "category"
+    return dtypes
+
+
+def iter_sales_chunks(data, mapping, chunksize=DEFAULT_CHUNK_ROWS):
+    if columnar.detect_format(data) != "csv":
+        for chunk in columnar.iter_frames(data, mapped_columns(mapping), chunksize):
+            yield clean_sales_frame(chunk, mapping)
+        return
+    reader = pd.read_csv(
+        as_source(data), usecols=mapped_columns(mapping), dtype=stream_dtypes(mapping), chunksize=chunksize
+    )
+    with reader:
+        for chunk in reader:
+            yield clean_sales_frame(chunk, mapping)
+
+
+def stream_region_partials(data, mapping, chunksize=DEFAULT_CHUNK_ROWS):
+    # Peak memory is one chunk plus the running aggregates, independent of
+    # how many rows the file holds.
+    pending = []
+    for chunk in iter_sales_chunks(data, mapping, chunksize):
+        pending.append(region_partials(
+            chunk, mapping["order"], mapping["product"], mapping["region"], mapping["qty"], mapping["price"]
+        ))
+        if len(pending) >= COMPACT_EVERY:
+            pending = [merge_partials(pending)]
+    if not pending:
+        empty = pd.DataFrame({col: pd.Series(dtype=object) for col in mapped_columns(mapping)})
+        pending.append(region_partials(
+            clean_sales_frame(empty, mapping),
+            mapping["order"], mapping["product"], mapping["region"], mapping["qty"], mapping["price"]
+        ))
+    return merge_partials(pending)
+
+
+def stream_sales_kpis(data, mapping, chunksize=DEFAULT_CHUNK_ROWS):
+    partials = stream_region_partials(data, mapping, chunksize)
+    return partials.combine(partials.regions)
+
+
+def mapping_key(data_hash, mapping):
+    return (data_hash, tuple(sorted(mapping.items())))
+
+
+def cached_sales_frame(cache, data, mapping, data_hash=None):
+    # Keyed on the upload's content and the column mapping, so reruns caused
+    # by unrelated widgets reuse the typed, cleaned frame.
+    data_hash = data_hash or content_hash(data)
+    return cache.get_or_load(mapping_key(data_hash, mapping), lambda: load_sales_frame(data, mapping))
+
+
+def acquire_sales_frame(store, data, mapping, data_hash):
+    # Same entry as cached_sales_frame, pinned in a DatasetStore for as long
+    # as the returned handle is held.
+    return store.acquire(mapping_key(data_hash, mapping), lambda: load_sales_frame(data, mapping))
+
+
+def cached_region_partials(cache, df, mapping, data_hash):
+    def build():
+        with stage("region partials"):
+            return region_partials(
+                df, mapping["order"], mapping["product"], mapping["region"], mapping["qty"], mapping["price"]
+            )
+
+    return cache.get_or_load(mapping_key(data_hash, mapping) + ("regions",), build)
+
+
+def cached_stream_partials(cache, data, mapping, data_hash, chunksize=DEFAULT_CHUNK_ROWS):
+    def build():
+        with stage("streamed read and partials"):
+            return stream_region_partials(data, mapping, chunksize)
+
+    return cache.get_or_load(mapping_key(data_hash, mapping) + ("regions",), build)
@@ -1,48 +1,77 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-from utils import calculate_kpis
-import io
-import base64
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from dashboard_common.app import (
+    RerunTimings, get_background_jobs, get_report_cache, read_static, session_dataset, upload_hash
+)
+from dashboard_common.columnar import UPLOAD_TYPES
+from dashboard_common.profiling import stage
+from dashboard_common.rendering import SectionRenderer
+from dashboard_common.store import DEFAULT_MIN_AVAILABLE_MB, DatasetStore
+from ingest import (
+    DEFAULT_CACHE_MB,
+    acquire_sales_frame,
+    cached_region_partials,
+    cached_sales_frame,
+    cached_stream_partials,
+    mapping_key,
+    read_preview,
+)
+from pipeline import sales_charts, sales_recommendations, sales_report_pdf, seasonality
+from preview import preview_kpis, sample_sales_preview
+from concurrent.futures import wait
+import time
 
 st.set_page_config(page_title="Sales Dashboard", page_icon="📊", layout="wide")
 
-with open("styles.css") as f:
-    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+timings = RerunTimings("sales")
 
-with open("templates/header.html") as f:
-    st.markdown(f.read(), unsafe_allow_html=True)
+st.markdown(f"<style>{read_static('styles.css')}</style>", unsafe_allow_html=True)
+st.markdown(read_static("templates/header.html"), unsafe_allow_html=True)
 
-def render_section(title, subtitle, fig=None):
-    with open("templates/section.html") as f:
-        section_template = f.read()
+@st.cache_resource
+def get_renderer():
+    return SectionRenderer("templates/section.html")
 
-    if fig is not None:
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", bbox_inches="tight")
-        buf.seek(0)
-        img_base64 = base64.b64encode(buf.read()).decode("utf-8")
-        content = f'<img src="data:image/png;base64,{img_base64}" width="100%"/>'
+CHART_FORMATS = {"PNG": "png", "SVG": "svg", "Native": None}
+
+def render_section(chart, chart_format="PNG"):
+    # "Native" hands the data to Streamlit's Vega-Lite charts, so only the
+    # series travels to the browser; PNG and SVG are embedded images.
+    if chart_format == "Native":
+        html = get_renderer().section_html(section_title=chart.title, section_subtitle=chart.subtitle)
+        st.markdown(html, unsafe_allow_html=True)
+        native_chart = st.line_chart if chart.kind == "line" else st.bar_chart
+        native_chart(chart.data, color=chart.color)
     else:
-        content = "<p>No data available</p>"
+        html, _ = get_renderer().render(
+            chart.title, chart.subtitle, chart.key, chart.plot, CHART_FORMATS[chart_format]
+        )
+        st.markdown(html, unsafe_allow_html=True)
 
-    section_html = section_template.replace("{{ section_title }}", title)
-    section_html = section_html.replace("{{ section_subtitle }}", subtitle)
-    section_html = section_html.replace("{{ section_content }}", content)
-    st.markdown(section_html, unsafe_allow_html=True)
+@st.cache_resource
+def get_ingest_cache():
+    # One store per server process, so concurrent sessions share datasets.
+    budget_mb = int(os.environ.get("SALES_INGEST_CACHE_MB", DEFAULT_CACHE_MB))
+    floor_mb = int(os.environ.get("SALES_MIN_AVAILABLE_MB", DEFAULT_MIN_AVAILABLE_MB))
+    return DatasetStore(budget_mb * 1024 * 1024, floor_mb * 1024 * 1024)
 
-uploaded_file = st.file_uploader("Upload CSV File", type=["csv"])
+uploaded_file = st.file_uploader("Upload CSV, Parquet or Arrow File", type=UPLOAD_TYPES)
 if uploaded_file:
 
-    df = pd.read_csv(uploaded_file)
+    with stage("read upload"):
+        data = uploaded_file.getvalue()
+    preview = read_preview(data)
     st.subheader("Preview of Uploaded Data")
-    st.dataframe(df.head())
+    st.dataframe(preview)
 
     st.sidebar.header("Column Mapping")
-    columns = df.columns.tolist()
+    columns = preview.columns.tolist()
     order_col = st.sidebar.selectbox("Order ID Column", columns)
     date_col = st.sidebar.selectbox("Order Date Column", columns)
     product_col = st.sidebar.selectbox("Product Column", columns)
@@ -50,32 +79,90 @@ if uploaded_file:
     price_col = st.sidebar.selectbox("Price Column", columns)
     region_col = st.sidebar.selectbox("Region Column", columns)
 
-    df["OrderDate"] = pd.to_datetime(df[date_col], errors="coerce")
-    df[qty_col] = pd.to_numeric(df[qty_col], errors="coerce")
-    df[price_col] = pd.to_numeric(df[price_col], errors="coerce")
-    df = df.dropna(subset=["OrderDate", qty_col, price_col])
-    df["Revenue"] = df[qty_col] * df[price_col]
-
+    mapping = {
+        "order": order_col,
+        "date": date_col,
+        "product": product_col,
+        "qty": qty_col,
+        "price": price_col,
+        "region": region_col,
+    }
+    with stage("hash upload"):
+        data_hash = upload_hash(uploaded_file, data)
+    cache = get_ingest_cache()
+    # Streaming folds the upload chunk by chunk into the aggregates and never
+    # materialises the full frame.
+    streaming = st.sidebar.checkbox("Streaming ingest (large files)")
+    # Fast preview answers from a region-stratified sample while the exact
+    # aggregates are computed in the background; the rerun after they land
+    # swaps them in.
+    fast_preview = st.sidebar.checkbox("Fast preview (sampled)")
+    partials_key = mapping_key(data_hash, mapping) + ("regions",)
+    exact_job = None
+    if fast_preview and partials_key not in cache:
+        if streaming:
+            load_exact = lambda: cached_stream_partials(cache, data, mapping, data_hash)
+        else:
+            load_exact = lambda: cached_region_partials(
+                cache, cached_sales_frame(cache, data, mapping, data_hash), mapping, data_hash
+            )
+        exact_job = get_background_jobs().submit(partials_key, load_exact)
+    previewing = exact_job is not None and not exact_job.done()
+    if previewing:
+        with stage("preview sample"):
+            sample = cache.get_or_load(
+                mapping_key(data_hash, mapping) + ("preview",), lambda: sample_sales_preview(data, mapping)
+            )
+        region_options = list(sample.labels)
+    elif exact_job is not None:
+        # Finished, but too large for the cache.
+        partials = exact_job.result()
+    elif streaming:
+        partials = cached_stream_partials(cache, data, mapping, data_hash)
+    else:
+        df = session_dataset(
+            "frame", mapping_key(data_hash, mapping),
+            lambda: acquire_sales_frame(cache, data, mapping, data_hash),
+        )
+        dtype_report = df.attrs.get("dtype_report")
+        if dtype_report is not None:
+            st.sidebar.caption(dtype_report.summary())
+        partials = cached_region_partials(cache, df, mapping, data_hash)
+    if not previewing:
+        region_options = list(partials.regions)
+
+    # Region toggles recombine the cached per-region aggregates instead of
+    # re-filtering and re-scanning the frame.
     st.sidebar.header("Filters")
-    regions = st.sidebar.multiselect(
-        "Select Region", df[region_col].unique(), default=df[region_col].unique()
-    )
-    df = df[df[region_col].isin(regions)]
-    if df.empty:
+    regions = st.sidebar.multiselect("Select Region", region_options, default=region_options)
+    errors = None
+    if previewing:
+        with stage("preview estimates"):
+            kpis, errors = preview_kpis(sample, mapping, regions)
+    else:
+        with stage("combine regions"):
+            kpis = partials.combine(regions)
+    chart_format = st.sidebar.radio("Chart Format", list(CHART_FORMATS), horizontal=True)
+    if kpis.row_count == 0:
         st.warning("No valid data available after filtering.")
-        st.stop()
-
-    total_revenue, avg_order_value, top_product = calculate_kpis(
-        df, order_col, product_col, qty_col, price_col
-    )
+        timings.stop()
 
     # Display KPIs
+    if previewing:
+        st.info(
+            f"Estimates from a stratified sample of {len(sample.frame):,} rows, with 95% intervals. "
+            "Average order value is a rough, low-leaning figure until then. "
+            "Exact results replace them automatically."
+        )
     col1, col2, col3 = st.columns(3)
     kpi_data = [
-        ("Total Revenue", f"₹ {total_revenue:,.0f}"),
-        ("Average Order Value", f"₹ {avg_order_value:,.0f}"),
-        ("Top Product", f"{top_product}"),
+        ("Total Revenue", f"₹ {kpis.total_revenue:,.0f}"),
+        ("Average Order Value", f"₹ {kpis.avg_order_value:,.0f}"),
+        ("Top Product", f"{kpis.top_product}"),
     ]
+    if errors is not None:
+        kpi_data[0] = ("Total Revenue", f"₹ {kpis.total_revenue:,.0f} ± {errors['total_revenue']:,.0f}")
+        kpi_data[1] = ("Average Order Value", f"~₹ {kpis.avg_order_value:,.0f}")
     for col, (title, value) in zip([col1, col2, col3], kpi_data):
         col.markdown(
             f"""
@@ -87,103 +174,57 @@ if uploaded_file:
             unsafe_allow_html=True,
         )
 
+    charts = sales_charts(kpis, errors)
+
     # Monthly Sales Trend
-    df["Month"] = df["OrderDate"].dt.to_period("M").astype(str)
-    monthly_sales = df.groupby("Month")["Revenue"].sum().sort_index()
-    monthly_sales_fig = None
-    if not monthly_sales.empty:
-        fig, ax = plt.subplots(figsize=(12, 4))
-        ax.plot(monthly_sales.index, monthly_sales.values, marker="o", color="#4facfe")
-        ax.set_xlabel("Month")
-        ax.set_ylabel("Revenue")
-        ax.set_title("Monthly Revenue Trend")
-        ax.grid(True, alpha=0.3)
-        plt.xticks(rotation=45)
-        fig.tight_layout()
-        render_section("Monthly Sales Trend", "Revenue over months", fig)
-        monthly_sales_fig = fig
+    if "monthly" in charts:
+        render_section(charts["monthly"], chart_format)
 
     # Seasonality insight
-    peak_month, low_month = None, None
-    if not monthly_sales.empty:
-        peak_month = monthly_sales.idxmax()
-        low_month = monthly_sales.idxmin()
+    peak_month, low_month = seasonality(kpis.monthly)
+    if peak_month is not None:
         st.markdown(f"**Seasonality Insight:** Highest revenue in {peak_month}, lowest in {low_month}.")
 
     # Top Products
-    top_products = df.groupby(product_col)["Revenue"].sum().sort_values(ascending=False).head(5)
-    top_products_fig = None
-    if not top_products.empty:
-        fig, ax = plt.subplots(figsize=(10, 4))
-        top_products.plot(kind="bar", ax=ax, color="#00f2fe")
-        ax.set_ylabel("Revenue")
-        ax.set_title("Top 5 Products")
-        fig.tight_layout()
-        render_section("Top 5 Products", "Highest revenue products", fig)
-        top_products_fig = fig
+    if "products" in charts:
+        render_section(charts["products"], chart_format)
 
     # Revenue by Region
-    region_sales = df.groupby(region_col)["Revenue"].sum()
-    region_sales_fig = None
-    if not region_sales.empty:
-        fig, ax = plt.subplots(figsize=(10, 4))
-        region_sales.plot(kind="bar", ax=ax, color="#4facfe")
-        ax.set_ylabel("Revenue")
-        ax.set_title("Revenue by Region")
-        fig.tight_layout()
-        render_section("Revenue by Region", "Sales across regions", fig)
-        region_sales_fig = fig
+    if "regions" in charts:
+        render_section(charts["regions"], chart_format)
 
     # Recommendations
-    recommendations = []
-    if avg_order_value < 500:
-        recommendations.append("- Consider offering bundle discounts to increase average order value.")
-    recommendations.append(f"- Focus marketing on the top product: {top_product}.")
-    if not region_sales.empty and region_sales.max() / region_sales.min() > 2:
-        recommendations.append("- Expand sales efforts in underperforming regions.")
-
     st.markdown("**Recommendations:**")
-    for rec in recommendations:
+    for rec in sales_recommendations(kpis):
         st.markdown(rec)
 
-    # Generate PDF report with summary
-    pdf_buffer = io.BytesIO()
-    doc = SimpleDocTemplate(pdf_buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
-    elements = []
-
-    # Summary Section
-    elements.append(Paragraph("Sales Summary", styles['Heading1']))
-    elements.append(Spacer(1, 12))
-    elements.append(Paragraph(f"Total Revenue: ₹ {total_revenue:,.0f}", styles['Heading2']))
-    elements.append(Paragraph(f"Average Order Value: ₹ {avg_order_value:,.0f}", styles['Heading2']))
-    elements.append(Paragraph(f"Top Product: {top_product}", styles['Heading2']))
-    elements.append(Spacer(1, 12))
-
-    if peak_month and low_month:
-        elements.append(Paragraph(f"Seasonality Insight: Highest revenue in {peak_month}, lowest in {low_month}", styles['Normal']))
-        elements.append(Spacer(1, 12))
-
-    elements.append(Paragraph("Recommendations:", styles['Heading2']))
-    for rec in recommendations:
-        elements.append(Paragraph(rec, styles['Normal']))
-    elements.append(Spacer(1, 12))
-
-    # Add Charts
-    for fig in [monthly_sales_fig, top_products_fig, region_sales_fig]:
-        if fig is not None:
-            buf = io.BytesIO()
-            fig.savefig(buf, format='png', bbox_inches='tight', dpi=150)
-            buf.seek(0)
-            img = Image(buf, width=500, height=250)
-            elements.append(img)
-            elements.append(Spacer(1, 12))
-
-    doc.build(elements)
-
-    st.download_button(
-        label="Download PDF Report",
-        data=pdf_buffer.getvalue(),
-        file_name="sales_report.pdf",
-        mime="application/pdf"
-    )
+    if previewing:
+        # Reports are only built from exact results.
+        timings.report()
+        status = st.empty()
+        started = time.monotonic()
+        while not exact_job.done():
+            status.caption(f"Computing exact results… {time.monotonic() - started:.0f}s")
+            wait([exact_job], timeout=0.5)
+        st.rerun()
+
+    # PDF report, built only on request and cached per dataset and filter state
+    report_key = mapping_key(data_hash, mapping) + (tuple(sorted(map(str, regions))),)
+    report_cache = get_report_cache("sales")
+    pdf_bytes = report_cache.get(report_key)
+    if pdf_bytes is None and st.button("Prepare PDF Report"):
+        # PNGs already rendered for the page are cache hits; SVG and native
+        # modes rasterise here, once, on request.
+        pdf_bytes = report_cache.put(report_key, sales_report_pdf(
+            kpis, charts, lambda chart: get_renderer().encode(chart.key, chart.plot)[0]
+        ))
+
+    if pdf_bytes is not None:
+        st.download_button(
+            label="Download PDF Report",
+            data=pdf_bytes,
+            file_name="sales_report.pdf",
+            mime="application/pdf"
+        )
+
+timings.report()
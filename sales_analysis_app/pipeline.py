@@ -0,0 +1,192 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import matplotlib
+import matplotlib.pyplot as plt
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from dashboard_common.columnar import UPLOAD_TYPES
+from dashboard_common.rendering import chart_key, downsample_series, encode_figure
+from ingest import DEFAULT_CHUNK_ROWS, stream_region_partials
+from report import build_sales_report
+
+# Longest trend drawn point-for-point; longer series are LTTB-downsampled.
+MAX_TREND_POINTS = 120
+MAPPING_ROLES = ["order", "date", "product", "qty", "price", "region"]
+
+
+@dataclass
+class Chart:
+    title: str
+    subtitle: str
+    key: str
+    data: pd.Series
+    kind: str
+    color: str
+    plot: object
+
+
+def plot_monthly_trend(monthly_trend, error=None):
+    fig, ax = plt.subplots(figsize=(12, 4))
+    ax.plot(monthly_trend.index, monthly_trend.values, marker="o", color="#4facfe")
+    if error is not None:
+        ax.fill_between(
+            monthly_trend.index, monthly_trend.values - error.values, monthly_trend.values + error.values,
+            color="#4facfe", alpha=0.2, label="95% interval",
+        )
+        ax.legend()
+    ax.set_xlabel("Month")
+    ax.set_ylabel("Revenue")
+    ax.set_title("Monthly Revenue Trend")
+    ax.grid(True, alpha=0.3)
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+    return fig
+
+
+def plot_revenue_bars(sums, title, color, error=None):
+    fig, ax = plt.subplots(figsize=(10, 4))
+    sums.plot(kind="bar", ax=ax, color=color, yerr=None if error is None else error.values, capsize=4)
+    ax.set_ylabel("Revenue")
+    ax.set_title(title)
+    fig.tight_layout()
+    return fig
+
+
+def sales_charts(kpis, errors=None):
+    # errors, from a sampled preview, holds 95% half-widths per series; they
+    # are drawn as a band or error bars and are part of the chart keys.
+    errors = errors or {}
+    charts = {}
+    if not kpis.monthly.empty:
+        trend = downsample_series(kpis.monthly, MAX_TREND_POINTS)
+        trend_error = errors["monthly"].loc[trend.index] if "monthly" in errors else None
+        charts["monthly"] = Chart(
+            "Monthly Sales Trend", "Revenue over months", chart_key(trend, trend_error, "monthly_line"),
+            trend, "line", "#4facfe", lambda: plot_monthly_trend(trend, trend_error),
+        )
+    if not kpis.top_products.empty:
+        product_error = errors.get("products")
+        charts["products"] = Chart(
+            "Top 5 Products", "Highest revenue products",
+            chart_key(kpis.top_products, product_error, "top_products_bar"),
+            kpis.top_products, "bar", "#00f2fe",
+            lambda: plot_revenue_bars(kpis.top_products, "Top 5 Products", "#00f2fe", product_error),
+        )
+    if not kpis.regions.empty:
+        region_error = errors.get("regions")
+        charts["regions"] = Chart(
+            "Revenue by Region", "Sales across regions", chart_key(kpis.regions, region_error, "region_bar"),
+            kpis.regions, "bar", "#4facfe",
+            lambda: plot_revenue_bars(kpis.regions, "Revenue by Region", "#4facfe", region_error),
+        )
+    return charts
+
+
+def seasonality(monthly):
+    if monthly.empty:
+        return None, None
+    return monthly.idxmax(), monthly.idxmin()
+
+
+def sales_recommendations(kpis):
+    recommendations = []
+    if kpis.avg_order_value < 500:
+        recommendations.append("- Consider offering bundle discounts to increase average order value.")
+    recommendations.append(f"- Focus marketing on the top product: {kpis.top_product}.")
+    if not kpis.regions.empty and kpis.regions.max() / kpis.regions.min() > 2:
+        recommendations.append("- Expand sales efforts in underperforming regions.")
+    return recommendations
+
+
+def sales_report_pdf(kpis, charts, encode_chart):
+    peak_month, low_month = seasonality(kpis.monthly)
+    return build_sales_report(
+        kpis.total_revenue, kpis.avg_order_value, kpis.top_product, peak_month, low_month,
+        sales_recommendations(kpis), [encode_chart(chart) for chart in charts.values()],
+    )
+
+
+def report_name(source):
+    # The extension is kept, so s1.csv and s1.parquet get separate reports.
+    return f"{os.path.basename(source)}.pdf"
+
+
+def store_report(source, mapping, output_dir, regions=None, chunksize=DEFAULT_CHUNK_ROWS):
+    # Runs in a worker process: stream the file into aggregates, render the
+    # charts off-screen and write <file name>.pdf.
+    matplotlib.use("Agg")
+    partials = stream_region_partials(source, mapping, chunksize)
+    kpis = partials.combine(partials.regions if regions is None else regions)
+    charts = sales_charts(kpis)
+    pdf_bytes = sales_report_pdf(kpis, charts, lambda chart: encode_figure(chart.plot()))
+    output_path = os.path.join(output_dir, report_name(source))
+    with open(output_path, "wb") as f:
+        f.write(pdf_bytes)
+    return output_path
+
+
+def expand_sources(paths):
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            sources.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if os.path.splitext(name)[1].lstrip(".").lower() in UPLOAD_TYPES
+            )
+        else:
+            sources.append(path)
+    return sources
+
+
+def report_clashes(sources):
+    # Files with the same name in different folders would overwrite each
+    # other's report.
+    names = [report_name(source) for source in sources]
+    return sorted({name for name in names if names.count(name) > 1})
+
+
+def run_batch(sources, mapping, output_dir, regions=None, workers=None, chunksize=DEFAULT_CHUNK_ROWS):
+    clashes = report_clashes(sources)
+    if clashes:
+        raise ValueError("several inputs would write " + ", ".join(clashes))
+    os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            source: pool.submit(store_report, source, mapping, output_dir, regions, chunksize)
+            for source in sources
+        }
+        return {source: future.result() for source, future in futures.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render sales PDF reports without the dashboard.")
+    parser.add_argument("paths", nargs="+", help="sales files, or directories of them")
+    for role in MAPPING_ROLES:
+        parser.add_argument(f"--{role}-col", required=True, help=f"column holding the {role} values")
+    parser.add_argument("--region", action="append", help="only include this region (repeatable)")
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    mapping = {role: getattr(args, f"{role}_col") for role in MAPPING_ROLES}
+    sources = expand_sources(args.paths)
+    clashes = report_clashes(sources)
+    if clashes:
+        parser.error("several inputs would write " + ", ".join(clashes))
+    for source, output_path in run_batch(
+        sources, mapping, args.output_dir, args.region, args.workers, args.chunksize
+    ).items():
+        print(f"{source} -> {output_path}")
+
+
+if __name__ == "__main__":
+    main()
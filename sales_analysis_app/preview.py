@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from dashboard_common.sampling import POOL_FACTOR, PREVIEW_ROWS, sample_rows, stratified_sample
+from ingest import clean_sales_frame, mapped_columns
+from utils import MISSING_REGION, SalesKPIs, encode_keys, month_keys, ranked_products, revenue_values, safe_ratio
+
+
+def sample_sales_preview(data, mapping, size=PREVIEW_ROWS, seed=0):
+    # Region-stratified sample of cleaned rows, so small regions keep enough
+    # rows for a usable estimate. Rows without a region form their own stratum.
+    pool, total_rows = sample_rows(data, mapped_columns(mapping), size * POOL_FACTOR, seed)
+    raw_rows = len(pool)
+    pool = clean_sales_frame(pool, mapping)
+    valid_rows = total_rows * len(pool) / raw_rows if raw_rows else 0
+    return stratified_sample(pool, pool[mapping["region"]].astype(object).fillna(MISSING_REGION), valid_rows, size)
+
+
+def domain_series(sample, values, codes, labels):
+    keep = codes >= 0
+    estimate, half_width = sample.domain_totals(values[keep], codes[keep], len(labels))
+    present = np.bincount(codes[keep], minlength=len(labels)) > 0
+    return (
+        pd.Series(estimate[present], index=labels[present], name="Revenue"),
+        pd.Series(half_width[present], index=labels[present], name="Revenue"),
+    )
+
+
+def preview_kpis(sample, mapping, regions):
+    # SalesKPIs estimated from the sample, plus 95% half-widths for the tiles
+    # and every chart series.
+    sample = sample.subset(sample.labels.isin(regions))
+    df = sample.frame
+    revenue = revenue_values(df, mapping["qty"], mapping["price"])
+    total, total_error = sample.domain_totals(revenue)
+
+    monthly, monthly_error = domain_series(sample, revenue, *month_keys(df["OrderDate"]))
+    products, product_error = domain_series(sample, revenue, *encode_keys(df[mapping["product"]]))
+    region_totals, region_error = sample.domain_totals(revenue, sample.strata, len(sample.labels))
+    present = sample.sampled > 0
+    region_sums = pd.Series(region_totals[present], index=sample.labels[present], name="Revenue")
+    region_error = pd.Series(region_error[present], index=sample.labels[present], name="Revenue")
+    top_product, top_products = ranked_products(products)
+
+    # Order value from the sampled orders' totals. Orders spanning several
+    # rows are rarely sampled whole, so this reads low for multi-line orders.
+    # The bias dominates any sampling error, so no interval is given for it.
+    order_codes, _ = encode_keys(df[mapping["order"]])
+    has_order = order_codes >= 0
+    order_totals = np.bincount(order_codes[has_order], weights=revenue[has_order])
+    order_totals = order_totals[np.bincount(order_codes[has_order]) > 0]
+    aov = safe_ratio(order_totals.sum(), len(order_totals))
+
+    kpis = SalesKPIs(
+        row_count=int(round(sample.total_rows)) if len(df) else 0,
+        total_revenue=total[0],
+        avg_order_value=aov,
+        top_product=top_product,
+        top_products=top_products,
+        monthly=monthly,
+        products=products,
+        regions=region_sums,
+    )
+    errors = {
+        "total_revenue": total_error[0],
+        "monthly": monthly_error,
+        "products": product_error.loc[top_products.index],
+        "regions": region_error,
+    }
+    return kpis, errors
@@ -0,0 +1,42 @@
+import io
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer
+
+from dashboard_common.profiling import stage
+
+
+def build_sales_report(total_revenue, avg_order_value, top_product, peak_month, low_month, recommendations, chart_pngs):
+    # chart_pngs are the encoded images already shown on the page, so the
+    # report never re-rasterises a figure.
+    pdf_buffer = io.BytesIO()
+    doc = SimpleDocTemplate(pdf_buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    elements = []
+
+    # Summary Section
+    elements.append(Paragraph("Sales Summary", styles['Heading1']))
+    elements.append(Spacer(1, 12))
+    elements.append(Paragraph(f"Total Revenue: ₹ {total_revenue:,.0f}", styles['Heading2']))
+    elements.append(Paragraph(f"Average Order Value: ₹ {avg_order_value:,.0f}", styles['Heading2']))
+    elements.append(Paragraph(f"Top Product: {top_product}", styles['Heading2']))
+    elements.append(Spacer(1, 12))
+
+    if peak_month and low_month:
+        elements.append(Paragraph(f"Seasonality Insight: Highest revenue in {peak_month}, lowest in {low_month}", styles['Normal']))
+        elements.append(Spacer(1, 12))
+
+    elements.append(Paragraph("Recommendations:", styles['Heading2']))
+    for rec in recommendations:
+        elements.append(Paragraph(rec, styles['Normal']))
+    elements.append(Spacer(1, 12))
+
+    # Add Charts
+    for png in chart_pngs:
+        elements.append(Image(io.BytesIO(png), width=500, height=250))
+        elements.append(Spacer(1, 12))
+
+    with stage("reportlab build"):
+        doc.build(elements)
+    return pdf_buffer.getvalue()
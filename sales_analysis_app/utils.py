@@ -1,9 +1,263 @@
+from dataclasses import dataclass
+
+import numpy as np
 import pandas as pd
 
-def calculate_kpis(df,order_col,product_col,qty_col,price_col):
-    df["Revenue"]=df[qty_col]*df[price_col]
-    total_revenue=df["Revenue"].sum()
-    avg_order_value=df.groupby(order_col)["Revenue"].sum().mean()
-    product_revenue=df.groupby(product_col)["Revenue"].sum()
-    top_product=product_revenue.idxmax() if not product_revenue.empty else "N/A"
-    return total_revenue,avg_order_value,top_product
+TOP_K = 5
+# Label for rows with a blank region, which are kept in a bucket of their own.
+MISSING_REGION = "(missing)"
+
+
+@dataclass
+class SalesKPIs:
+    row_count: int
+    total_revenue: float
+    avg_order_value: float
+    top_product: object
+    top_products: pd.Series
+    monthly: pd.Series
+    products: pd.Series
+    regions: pd.Series
+
+
+def encode_keys(values):
+    # Integer codes plus sorted labels; categoricals already carry both.
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), pd.Index(values.cat.categories)
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes, pd.Index(uniques)
+
+
+def region_keys(values):
+    # encode_keys, with rows that have no region coded to MISSING_REGION so
+    # that selecting every region still covers every row. Labels stay sorted,
+    # as merged partials and the preview's strata sort them.
+    codes, labels = encode_keys(values)
+    if (codes < 0).any():
+        codes, labels = encode_keys(values.astype(object).fillna(MISSING_REGION))
+    return codes, labels
+
+
+def month_keys(dates):
+    months = dates.to_numpy().astype("datetime64[M]")
+    codes, uniques = pd.factorize(months, sort=True)
+    return codes, pd.Index(np.datetime_as_string(uniques, unit="M"))
+
+
+def revenue_values(df, qty_col, price_col):
+    if "Revenue" in df:
+        revenue = df["Revenue"].to_numpy(dtype="float64")
+    else:
+        revenue = df[qty_col].to_numpy(dtype="float64") * df[price_col].to_numpy(dtype="float64")
+    nan = np.isnan(revenue)
+    if nan.any():
+        revenue = np.where(nan, 0.0, revenue)
+    return revenue
+
+
+def grouped_sum(codes, labels, weights, name="Revenue"):
+    # Sum of weights per code, keeping only keys that occur (like groupby).
+    valid = codes >= 0
+    if not valid.all():
+        codes, weights = codes[valid], weights[valid]
+    sums = np.bincount(codes, weights=weights, minlength=len(labels))
+    present = np.bincount(codes, minlength=len(labels)) > 0
+    return pd.Series(sums[present], index=labels[present], name=name)
+
+
+def average_order_value(order_keys, revenue):
+    # Mean of per-order totals is total order revenue over the order count,
+    # so no per-order groupby is needed.
+    codes, labels = encode_keys(order_keys)
+    has_order = codes >= 0
+    if not has_order.all():
+        codes, revenue = codes[has_order], revenue[has_order]
+    order_count = np.count_nonzero(np.bincount(codes, minlength=len(labels)))
+    return safe_ratio(revenue.sum(), order_count)
+
+
+def safe_ratio(numerator, denominator):
+    return numerator / denominator if denominator else np.nan
+
+
+def top_label(sums):
+    return sums.idxmax() if not sums.empty else "N/A"
+
+
+def top_k(sums, k=TOP_K):
+    # The k largest sums by partial selection instead of a full sort, in
+    # descending order. Ties keep their original order, as idxmax does.
+    values = sums.to_numpy()
+    if len(values) > k:
+        picked = np.argpartition(-values, k - 1)[:k]
+    else:
+        picked = np.arange(len(values))
+    picked = picked[np.lexsort((picked, -values[picked]))]
+    return sums.iloc[picked]
+
+
+def ranked_products(products):
+    # One ranking feeds the KPI tile, the chart and the recommendations.
+    top_products = top_k(products)
+    top_product = top_products.index[0] if not top_products.empty else "N/A"
+    return top_product, top_products
+
+
+def sales_kpis(df, order_col, product_col, region_col, qty_col, price_col, date_col="OrderDate"):
+    # Every aggregate the dashboard shows, from one integer-coded pass per key
+    # over the revenue array. The caller's frame is neither copied nor mutated.
+    revenue = revenue_values(df, qty_col, price_col)
+    products = grouped_sum(*encode_keys(df[product_col]), revenue)
+    top_product, top_products = ranked_products(products)
+    return SalesKPIs(
+        row_count=len(revenue),
+        total_revenue=revenue.sum(),
+        avg_order_value=average_order_value(df[order_col], revenue),
+        top_product=top_product,
+        top_products=top_products,
+        monthly=grouped_sum(*month_keys(df[date_col]), revenue),
+        products=products,
+        regions=grouped_sum(*region_keys(df[region_col]), revenue),
+    )
+
+
+def calculate_kpis(df, order_col, product_col, qty_col, price_col):
+    revenue = revenue_values(df, qty_col, price_col)
+    products = grouped_sum(*encode_keys(df[product_col]), revenue)
+    return revenue.sum(), average_order_value(df[order_col], revenue), top_label(products)
+
+
+@dataclass
+class RegionPartials:
+    # Per-region aggregates kept alongside the cleaned frame. Any region
+    # selection is answered by combining these, in O(regions x months) for
+    # the KPI tiles and trend and O(region/product pairs) for products.
+    month_revenue: pd.DataFrame
+    month_rows: pd.DataFrame
+    product_revenue: pd.Series
+    order_revenue: pd.Series
+    region_orders: dict
+    orders_span_regions: bool
+
+    @property
+    def regions(self):
+        return self.month_revenue.index
+
+    @property
+    def nbytes(self):
+        frames = [self.month_revenue, self.month_rows, self.product_revenue, self.order_revenue]
+        orders = sum(keys.nbytes for keys in self.region_orders.values())
+        return int(sum(np.sum(f.memory_usage(deep=True)) for f in frames) + orders)
+
+    def order_count(self, regions):
+        if not self.orders_span_regions:
+            return sum(len(self.region_orders[r]) for r in regions)
+        if not regions:
+            return 0
+        return len(pd.unique(np.concatenate([self.region_orders[r] for r in regions])))
+
+    def combine(self, regions):
+        regions = [r for r in self.regions if r in set(regions)]
+        month_revenue = self.month_revenue.loc[regions]
+        month_rows = self.month_rows.loc[regions].sum(axis=0)
+        monthly = month_revenue.sum(axis=0)[month_rows > 0].rename("Revenue")
+        region_sums = month_revenue.sum(axis=1).rename("Revenue")
+        if len(regions) == len(self.regions):
+            selected = self.product_revenue
+        else:
+            selected = self.product_revenue[self.product_revenue.index.get_level_values(0).isin(regions)]
+        products = selected.groupby(level=1, sort=False).sum()
+        products.index.name = None
+        top_product, top_products = ranked_products(products)
+        return SalesKPIs(
+            row_count=int(month_rows.sum()),
+            total_revenue=region_sums.sum(),
+            avg_order_value=safe_ratio(self.order_revenue.loc[regions].sum(), self.order_count(regions)),
+            top_product=top_product,
+            top_products=top_products,
+            monthly=monthly,
+            products=products,
+            regions=region_sums,
+        )
+
+
+def region_partials(df, order_col, product_col, region_col, qty_col, price_col, date_col="OrderDate"):
+    revenue = revenue_values(df, qty_col, price_col)
+    region_codes, all_regions = region_keys(df[region_col])
+    month_codes, month_labels = month_keys(df[date_col])
+    product_codes, product_labels = encode_keys(df[product_col])
+    order_codes, order_labels = encode_keys(df[order_col])
+
+    keep = month_codes >= 0
+    region_codes, month_codes = region_codes[keep], month_codes[keep]
+    product_codes, order_codes, revenue = product_codes[keep], order_codes[keep], revenue[keep]
+    n_regions, n_months = len(all_regions), len(month_labels)
+
+    cell = region_codes.astype("int64") * n_months + month_codes
+    shape = (n_regions, n_months)
+    month_revenue = np.bincount(cell, weights=revenue, minlength=n_regions * n_months).reshape(shape)
+    month_rows = np.bincount(cell, minlength=n_regions * n_months).reshape(shape)
+    present = month_rows.sum(axis=1) > 0
+    region_labels = all_regions[present]
+    month_revenue = pd.DataFrame(month_revenue[present], index=region_labels, columns=month_labels)
+    month_rows = pd.DataFrame(month_rows[present], index=region_labels, columns=month_labels)
+
+    has_product = product_codes >= 0
+    product_revenue = pd.Series(revenue[has_product]).groupby(
+        [region_codes[has_product], product_codes[has_product]], sort=True
+    ).sum()
+    product_revenue.index = pd.MultiIndex.from_arrays([
+        all_regions.take(product_revenue.index.get_level_values(0)),
+        product_labels.take(product_revenue.index.get_level_values(1)),
+    ])
+
+    has_order = order_codes >= 0
+    order_revenue = np.bincount(region_codes[has_order], weights=revenue[has_order], minlength=n_regions)
+    order_revenue = pd.Series(order_revenue[present], index=region_labels)
+    n_orders = max(len(order_labels), 1)
+    pairs = np.unique(region_codes[has_order].astype("int64") * n_orders + order_codes[has_order])
+    pair_regions, pair_orders = np.divmod(pairs, n_orders)
+    bounds = np.searchsorted(pair_regions, np.arange(n_regions + 1))
+    region_orders = {
+        all_regions[r]: order_labels.take(pair_orders[bounds[r]:bounds[r + 1]]).to_numpy()
+        for r in np.flatnonzero(present)
+    }
+
+    return RegionPartials(
+        month_revenue=month_revenue,
+        month_rows=month_rows,
+        product_revenue=product_revenue,
+        order_revenue=order_revenue,
+        region_orders=region_orders,
+        orders_span_regions=len(pairs) > len(np.unique(pair_orders)),
+    )
+
+
+def merge_partials(parts):
+    # Fold partials built from disjoint row sets (chunks, files, workers)
+    # into one, as if region_partials had seen all the rows at once.
+    parts = list(parts)
+    if len(parts) == 1:
+        return parts[0]
+    month_revenue = pd.concat([p.month_revenue for p in parts]).fillna(0)
+    month_revenue = month_revenue.groupby(level=0).sum().sort_index(axis=1)
+    month_rows = pd.concat([p.month_rows for p in parts]).fillna(0)
+    month_rows = month_rows.groupby(level=0).sum().sort_index(axis=1).astype("int64")
+    product_revenue = pd.concat([p.product_revenue for p in parts]).groupby(level=[0, 1]).sum()
+    order_revenue = pd.concat([p.order_revenue for p in parts]).groupby(level=0).sum()
+
+    region_orders = {}
+    for region in month_revenue.index:
+        keys = [p.region_orders[region] for p in parts if region in p.region_orders]
+        region_orders[region] = pd.unique(np.concatenate(keys)) if len(keys) > 1 else keys[0]
+    counts = sum(len(keys) for keys in region_orders.values())
+    distinct = len(pd.unique(np.concatenate(list(region_orders.values())))) if region_orders else 0
+
+    return RegionPartials(
+        month_revenue=month_revenue,
+        month_rows=month_rows,
+        product_revenue=product_revenue,
+        order_revenue=order_revenue,
+        region_orders=region_orders,
+        orders_span_regions=counts > distinct,
+    )